@@ -1,9 +1,10 @@
 import streamlit as st # type: ignore
 import pandas as pd # type: ignore
-import numpy as np # type: ignore
 import plotly.express as px # type: ignore
 from datetime import datetime
 from streamlit_plotly_events import plotly_events # type: ignore
+from dataset import load_netflix, netflix_bridges, netflix_filters
+from image_cache import WALLPAPER_URL, get_image_cache
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -35,71 +36,25 @@ def show_global_trends():
             """,
             unsafe_allow_html=True
         )
-    set_background_image("https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg")
-
-    # Load the data
-    df = pd.read_csv("netflix_titles.csv", decimal=',')
-
-    # Filling null values
-    df = df.dropna(subset=["date_added", "duration"])
-    df['rating'] = df['rating'].fillna(df['rating'].mode()[0])
-    df['duration'] = df['duration'].fillna(df['duration'].mode()[0])
-    df['country'] = df['country'].fillna(df['country'].mode()[0])
-    df['cast'] = df['cast'].fillna('Unknown')
-    df['director'] = df['director'].fillna('Unknown')
-
-    # Change the date_added column into datetime datatype
-    df['date_added'] = df['date_added'].str.strip()
-    df['date_added'] = pd.to_datetime(df['date_added'], format='%B %d, %Y', errors='coerce')
-
-    # Clean and preprocess duration (before filtering)
-    df['duration_value'] = df['duration'].str.extract('(\d+)').astype(float)
-    df['duration_unit'] = df['duration'].str.extract('([a-zA-Z]+)')
-    def convert_to_minutes(row):
-        if pd.isna(row['duration_value']) or pd.isna(row['duration_unit']):
-            return np.nan
-        unit = row['duration_unit'].strip().lower()
-        if unit == 'min':
-            return row['duration_value']
-        elif unit in ['season', 'seasons']:
-            return row['duration_value'] * 10 * 60
-        else:
-            return np.nan
-    df['duration_minutes'] = df.apply(convert_to_minutes, axis=1)
-    df['duration_hours'] = df['duration_minutes'] / 60
-    df = df.drop(columns=['duration_value', 'duration_unit', 'duration'])  
-
-    # Rating mapping
-    rating_mapping = {
-        'TV-Y': 'Kids',
-        'TV-Y7': 'Kids',
-        'TV-Y7-FV': 'Kids',
-        'TV-G': 'Kids',
-        'G': 'Kids',
-        'PG': 'Family',
-        'TV-PG': 'Family',
-        'PG-13': 'Teen',
-        'TV-14': 'Teen',
-        'R': 'Adult',
-        'TV-MA': 'Adult',
-        'NC-17': 'Adult',
-        'NR': 'Adult',
-        'UR': 'Adult'
-    }
-    df['rating_category'] = df['rating'].map(rating_mapping)
+    set_background_image(get_image_cache().background_url(WALLPAPER_URL))
 
+    # Load the data (preprocessed once and cached in a columnar file next to the CSV)
+    titles = load_netflix()
+    bridges = netflix_bridges()
+    filters = netflix_filters()
 
     # Create date picker
     st.subheader("Pick the date movie added")
     col1, col2 = st.columns((2))
-    startDate = pd.to_datetime(df['date_added']).min()
-    endDate = pd.to_datetime(df['date_added']).max()
+    startDate = titles['date_added'].min()
+    endDate = titles['date_added'].max()
     with col1:
         date1 = pd.to_datetime(st.date_input("Start Date", startDate))
     with col2:
         date2 = pd.to_datetime(st.date_input("End Date", endDate))
 
-    df = df[(df['date_added'] >= date1) & (df['date_added'] <= date2)].copy()
+    date_range = (date1.to_datetime64(), date2.to_datetime64())
+    df = titles[filters.range_mask('date_added', *date_range)]
 
     # Create side bar
     st.sidebar.markdown("---")
@@ -118,23 +73,16 @@ def show_global_trends():
     rating_categories = sorted(df['rating_category'].unique())
     rating_category = st.sidebar.multiselect("Pick your rating category: ", rating_categories)
 
-    # Apply filters
-    filtered_df = df.copy()
-    if type: filtered_df = filtered_df[filtered_df.type.isin(type)]
-    if rating_category: filtered_df = filtered_df[filtered_df['rating_category'].isin(rating_category)]
-    filtered_df = filtered_df[
-        (filtered_df['release_year'] >= year_range[0]) &
-        (filtered_df['release_year'] <= year_range[1])
-    ]
+    # Apply filters (per-predicate masks are cached, so only the changed filter is re-evaluated)
+    filtered_df = titles[filters.mask(
+        ranges={'date_added': date_range, 'release_year': year_range},
+        isin={'type': type, 'rating_category': rating_category}
+    )]
 
-    # Create country_content from filtered_df
-    country_content = filtered_df.assign(country=filtered_df['country'].str.split(',')).explode('country')
-    country_content['country'] = country_content['country'].str.strip()
-    country = st.sidebar.multiselect("Pick your country: ", sorted(country_content['country'].unique()))
-    if country:
-        filtered_df_2 = country_content[country_content['country'].isin(country)].copy()
-    else:
-        filtered_df_2 = country_content.copy()
+    # Explode countries of the filtered titles through the pre-built country bridge
+    country = st.sidebar.multiselect("Pick your country: ", bridges['country'].labels_in(filtered_df.index))
+    filtered_df_2 = bridges['country'].explode(filtered_df, 'country', labels=country or None,
+                                               columns=['title', 'type', 'duration_hours'])
 
     # Main content
     tab1, tab2, tab3 = st.tabs(["Duration Trends", "Number of Titles", "Recommendations"])
@@ -312,11 +260,10 @@ def show_global_trends():
             clicked_country = country_counts.iloc[point_index]['country'] if 0 <= point_index < len(country_counts) else None
             if clicked_country:
                 st.subheader(f"Top Genre Breakdown in {clicked_country}")
-                # Filter for the clicked country before splitting and exploding
+                # Filter for the clicked country, then join its titles to their genres
                 country_specific_df = filtered_df_2[filtered_df_2['country'] == clicked_country]
-                # Split the genre
-                genre_df = country_specific_df.assign(genre=country_specific_df['listed_in'].str.split(',')).explode('genre')
-                genre_df['genre'] = genre_df['genre'].str.strip()
+                country_titles = filtered_df.loc[country_specific_df.index.unique(), ['title']]
+                genre_df = bridges['genre'].explode(country_titles, 'genre')
                 genre_counts = genre_df.groupby('genre')['title'].nunique().reset_index(name='count')
                 # Calculate percentages
                 total_titles = genre_counts['count'].sum()
@@ -347,14 +294,10 @@ def show_global_trends():
         # Personalized Recommendations with Genre Choice
         st.header("Personalized Recommendations")
         if not filtered_df_2.empty:
-            # Split the genre
-            genre_df = filtered_df_2.assign(genre=filtered_df_2['listed_in'].str.split(',')).explode('genre')
-            genre_df['genre'] = genre_df['genre'].str.strip()
-            available_genres = sorted(genre_df['genre'].unique())
+            available_genres = bridges['genre'].labels_in(filtered_df_2.index.unique())
             selected_genre = st.selectbox("Select a genre you prefer:", available_genres)
-            recommendations = filtered_df[
-                (filtered_df['listed_in'].str.contains(selected_genre, na=False, case=False))
-            ]
+            genre_rows, _ = bridges['genre'].pairs(filtered_df.index, labels=[selected_genre])
+            recommendations = filtered_df.loc[genre_rows]
             if not recommendations.empty:
                 recommendations = recommendations.sample(min(5, len(recommendations)))
                 selected_countries = ", ".join(country) if country else "all countries"
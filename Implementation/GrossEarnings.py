@@ -3,6 +3,9 @@ import pandas as pd # type: ignore
 import plotly.express as px # type: ignore
 from datetime import datetime
 from streamlit_plotly_events import plotly_events # type: ignore
+from dataset import load_imdb, imdb_bridges, imdb_filters
+from analytics import top_by_value, year_rollup
+from image_cache import WALLPAPER_URL, get_image_cache
 
 import warnings
 
@@ -36,30 +39,13 @@ def show_gross_earnings():
             """,
             unsafe_allow_html=True
         )
-    set_background_image("https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg")
+    set_background_image(get_image_cache().background_url(WALLPAPER_URL))
 
-    # Load data
-    df = pd.read_csv('imdb_top_1000.csv')
+    # Load data (cleaned once per process and shared across reruns)
+    df = load_imdb()
 
-    # Handling missing values
-    df.Certificate = df.Certificate.fillna('Unrated')
-    df['Meta_score']= df['Meta_score'].fillna(df['Meta_score'].mode()[0])
-    df['Gross'] = df['Gross'].str.replace(',', '').fillna(0).astype(float)
-
-    # Change release year to numeric
-    df['Released_Year'] = pd.to_numeric(df['Released_Year'], errors='coerce')
-    df = df.dropna(subset=['Released_Year'])
-    df['Released_Year'] = df['Released_Year'].astype(int)
-    # Change runtime to numeric
-    df['Runtime'] = df['Runtime'].str.extract(r'(\d+)').astype(float)
-    # Change gross to numeric
-    df['Gross'] = pd.to_numeric(df['Gross'], errors='coerce')/1e6
-    df = df.rename(columns={'Runtime':'Runtime (min)','Gross':'Gross (M)'}) 
-
-    # Split for genres
-    df['Genre'] = df['Genre'].astype(str)
-    genre_content = df.assign(genre=df['Genre'].str.split(',')).explode('genre')
-    genre_content['genre'] = genre_content['genre'].str.strip()
+    # Genres are pre-split into an integer-coded bridge at load time
+    genre_bridge = imdb_bridges()['genre']
 
 
     # Flters
@@ -95,19 +81,19 @@ def show_gross_earnings():
         format = "%d",
     )  
     # Selection for Genres
-    genre = st.sidebar.multiselect("Pick your genre: ", sorted(genre_content['genre'].unique(),reverse=False))
+    genre = st.sidebar.multiselect("Pick your genre: ", list(genre_bridge.categories))
+    genre_mode = st.sidebar.radio("Match genres: ", ["Any selected", "All selected"], horizontal=True)
 
     # Filter the dataset based on selected ranges
-    filtered_df = df[
-        (df['IMDB_Rating'] >= imdb_range[0]) &
-        (df['IMDB_Rating'] <= imdb_range[1]) &
-        (df['Meta_score'] >= meta_range[0]) &
-        (df['Meta_score'] <= meta_range[1]) &
-        (df['Released_Year'] >= year_range[0]) &
-        (df['Released_Year'] <= year_range[1])
-    ]
+    # (per-slider masks are cached, so only the slider that moved is re-evaluated)
+    mask = imdb_filters().mask(ranges={
+        'IMDB_Rating': imdb_range,
+        'Meta_score': meta_range,
+        'Released_Year': year_range
+    })
     if genre:
-        filtered_df = filtered_df[filtered_df['Genre'].apply(lambda x: any(g in x for g in genre))]
+        mask = mask & genre_bridge.mask(genre, mode='all' if genre_mode == "All selected" else 'any')
+    filtered_df = df[mask]
 
     st.markdown(
         """
@@ -137,7 +123,9 @@ def show_gross_earnings():
     with tab1:
         # 1. Gross Earnings Over Time
         st.subheader("Total Gross Earnings (M) Over Time: Peak Performers")
-        gross_trends = filtered_df.groupby('Released_Year')['Gross (M)'].sum().reset_index()
+        # Cached per-year rollup: totals for the line and the top grossing row per year
+        gross_rollup = year_rollup(filtered_df)
+        gross_trends = gross_rollup.totals()
         # Check if filtered_df is empty
         if filtered_df.empty:
             st.warning("No data available after applying filters. Please adjust your filter settings.")
@@ -149,7 +137,7 @@ def show_gross_earnings():
                         labels={'Released_Year': 'Year', 'Gross (M)': 'Total Gross Earnings (M)'},
                         color_discrete_sequence=['#FF2400']
             )
-            highest_gross = filtered_df.loc[filtered_df.groupby('Released_Year')['Gross (M)'].idxmax()]
+            highest_gross = filtered_df.loc[gross_rollup.max_rows]
 
             # Check if highest_gross has data
             if not highest_gross.empty:
@@ -178,14 +166,12 @@ def show_gross_earnings():
                 if selected_points:
                     try:
                         click_x = selected_points[0]['x']
-                        nearest_year_idx = (highest_gross['Released_Year'] - click_x).abs().idxmin()
-                        # Convert index label to positional index
-                        if pd.isna(nearest_year_idx):
+                        # O(1) lookup of the clicked year in the rollup
+                        positional_idx = gross_rollup.lookup(click_x)
+                        if positional_idx is None:
                             st.session_state.clicked_movie = None
                             st.warning("No valid movie data found for the clicked year.")
                         else:
-                            # Convert the index label to a positional index for iloc
-                            positional_idx = highest_gross.index.get_loc(nearest_year_idx)
                             movie_data = highest_gross.iloc[positional_idx]
                             st.session_state.clicked_movie = {
                                 'title': movie_data['Series_Title'],
@@ -198,7 +184,7 @@ def show_gross_earnings():
                                 'poster': movie_data['Poster_Link'],
                                 'overview': movie_data['Overview']
                             }
-                            st.session_state.selected_year = int(highest_gross.loc[nearest_year_idx, 'Released_Year'])  
+                            st.session_state.selected_year = int(gross_rollup.years[positional_idx])  
                     except (IndexError, KeyError, ValueError) as e:
                         st.session_state.clicked_movie = None
                         st.session_state.selected_year = None
@@ -227,9 +213,7 @@ def show_gross_earnings():
         col1, col2 = st.columns([1,1])
         with col1:
             # 2. Top 10 Directors by Gross (M)
-            directors = filtered_df.groupby('Director').agg({'Gross (M)': 'sum', 'Series_Title': 'count'}).reset_index()
-            directors_sorted = directors.sort_values(by='Gross (M)', ascending=False)
-            top_10_directors = directors_sorted.head(10)
+            top_10_directors = top_by_value(filtered_df, imdb_bridges()['director'], 'Director')
             # Create an interactive bar chart
             st.subheader("Directors of Blockbusters: Top 10 by Gross (M)")
             fig2 = px.bar(
@@ -237,8 +221,8 @@ def show_gross_earnings():
                 x='Director',
                 y='Gross (M)',
                 text=[f"${gross:.2f}M" for gross in top_10_directors['Gross (M)']],
-                hover_data={'Series_Title': True},  
-                labels={'Gross(M)': 'Total Gross Earnings (M)', 'Director': 'Director','Series_Title':'Movie Count'},
+                hover_data={'Movie Count': True},  
+                labels={'Gross(M)': 'Total Gross Earnings (M)', 'Director': 'Director'},
                 color='Gross (M)', 
                 color_continuous_scale=['#FFF5EB', '#FF9999', '#FF2400'] 
             )
@@ -267,19 +251,8 @@ def show_gross_earnings():
                         delta=round(top_10_directors['Gross (M)'].mean() - top_10_directors['Gross (M)'].median(), 1))
         with col2:
             # 3. Top 10 Actors by Gross (M)
-            actors_1 = filtered_df.groupby('Star1')['Gross (M)'].sum().reset_index().rename(columns={'Star1': 'Actor', 'Gross (M)': 'Gross_1'})
-            actors_2 = filtered_df.groupby('Star2')['Gross (M)'].sum().reset_index().rename(columns={'Star2': 'Actor', 'Gross (M)': 'Gross_2'})
-            actors_3 = filtered_df.groupby('Star3')['Gross (M)'].sum().reset_index().rename(columns={'Star3': 'Actor', 'Gross (M)': 'Gross_3'})
-            actors_4 = filtered_df.groupby('Star4')['Gross (M)'].sum().reset_index().rename(columns={'Star4': 'Actor', 'Gross (M)': 'Gross_4'})
-
-            # Merge all datasets on 'Actor' and use 'outer' join to keep all actors
-            actors_merged = actors_1
-            for df_actor in [actors_2, actors_3, actors_4]:
-                actors_merged = pd.merge(actors_merged, df_actor, on='Actor', how='outer')
-            actors_merged['Gross (M)'] = actors_merged[['Gross_1', 'Gross_2', 'Gross_3', 'Gross_4']].sum(axis=1)
-            actors_merged = actors_merged.drop(columns=['Gross_1', 'Gross_2', 'Gross_3', 'Gross_4'])
-            actors_sorted = actors_merged.sort_values(by='Gross (M)', ascending=False)
-            top_10_actors = actors_sorted.head(10)
+            # Star1..Star4 are pre-joined into one actor bridge, aggregated in a single pass
+            top_10_actors = top_by_value(filtered_df, imdb_bridges()['star'], 'Actor')
             # Create an interactive bar chart
             st.subheader("Stars of the Box Office: Top 10 by Gross (M)")
             fig3 = px.bar(
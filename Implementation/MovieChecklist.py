@@ -1,13 +1,20 @@
 import streamlit as st #type:ignore
-import requests #type:ignore
-from auth import load_credentials, update_user_profile
+from auth import (INBOX_PAGE_SIZE, get_user, get_inbox, get_movies, list_usernames, add_movie, mark_watched,
+                  set_rating, remove_movie, push_notifications, mark_all_read, clear_notifications)
+import time
 from datetime import datetime
+from image_cache import get_image_cache
+from tmdb import PopularFeed, get_client
+from title_index import title_index
+
+# Quiet period before a search that is not cached goes to TMDb
+SEARCH_DEBOUNCE = 0.4
 
 def show_movie_checklist():
-    # TMDb API configuration
-    API_KEY = "e206cf8b0ba47f28233d0a28ff83c414"
-    BASE_URL = "https://api.themoviedb.org/3"
-    IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w200"
+    # TMDb API client (pooled session shared across reruns and sessions)
+    tmdb = get_client()
+    titles = title_index(cache=tmdb.cache)
+    images = get_image_cache()
 
     # Custom CSS for styling notifications and buttons
     st.markdown("""
@@ -35,54 +42,47 @@ def show_movie_checklist():
     </style>
     """, unsafe_allow_html=True)
 
-    def get_popular_movies(page=1):
-        url = f"{BASE_URL}/movie/popular?api_key={API_KEY}&language=en-US&page={page}"
-        response = requests.get(url)
-        return response.json()['results'] if response.status_code == 200 else []
-
     def search_movies(query, page=1):
-        url = f"{BASE_URL}/search/movie?api_key={API_KEY}&query={query}&page={page}"
-        response = requests.get(url)
-        return response.json()['results'] if response.status_code == 200 else []
+        return tmdb.search_movies(query, page)
 
     def get_movie_details(movie_id):
-        url = f"{BASE_URL}/movie/{movie_id}?api_key={API_KEY}&language=en-US"
-        response = requests.get(url)
-        return response.json() if response.status_code == 200 else {}
-
-    def get_keyword_suggestions(query, movies):
-        query = query.lower()
-        suggestions = set()
-        for movie in movies:
-            title = movie['title'].lower()
-            if query in title and title != query:
-                suggestions.add(movie['title'])
-            if len(suggestions) >= 3:
-                break
-        return list(suggestions)
+        return tmdb.movie_details(movie_id)
 
     # Main logic
     col1, col2 = st.columns([9, 1])  
     with col1:
         st.title("🎬 My Movielist")
     with col2:
-        creds = load_credentials()
         current_user = st.session_state.username
-        notifications = creds[current_user].get("notifications", [])
-        unread_count = sum(1 for notif in notifications if not notif["read"])
+        user = get_user(current_user, notifications=False) or {}
+        unread_count = user.get("unread", 0)
         with st.popover(f"🔔 ({unread_count})", help="View your notifications"):
+            # Stack of page cursors: None is the newest page, then the last id of each older page
+            if "inbox_pages" not in st.session_state:
+                st.session_state.inbox_pages = [None]
+            inbox_pages = st.session_state.inbox_pages
+            notifications = get_inbox(current_user, limit=INBOX_PAGE_SIZE + 1, before=inbox_pages[-1])
+            has_older = len(notifications) > INBOX_PAGE_SIZE
+            notifications = notifications[:INBOX_PAGE_SIZE]
             if notifications:
-                for i, notif in enumerate(notifications):
+                for notif in notifications:
                     style_class = "notification-unread" if not notif["read"] else "notification-read"
                     st.markdown(f"<p class='{style_class}'>{notif['message']}</p>", unsafe_allow_html=True)
+                col_newer, col_older = st.columns(2)
+                with col_newer:
+                    if st.button("Newer", disabled=len(inbox_pages) == 1, key="inbox_newer"):
+                        inbox_pages.pop()
+                        st.rerun()
+                with col_older:
+                    if st.button("Older", disabled=not has_older, key="inbox_older"):
+                        inbox_pages.append(notifications[-1]["id"])
+                        st.rerun()
                 if st.button("Mark All as Read", key="mark_all_read"):
-                    for i in range(len(notifications)):
-                        notifications[i]["read"] = True
-                    update_user_profile(current_user, notifications=notifications)
+                    mark_all_read(current_user)
                     st.rerun()
                 if st.button("Clear All Notifications", key="clear_all_notifications"):
-                    notifications.clear()
-                    update_user_profile(current_user, notifications=notifications)
+                    clear_notifications(current_user)
+                    st.session_state.inbox_pages = [None]
                     st.rerun()
             else:
                 st.write("No notifications yet!")
@@ -93,16 +93,14 @@ def show_movie_checklist():
 
     # Load user data
     if 'movie_checklist' not in st.session_state:
-        st.session_state.movie_checklist = creds[current_user].get("movie_checklist", {})
-    if 'popular_movies' not in st.session_state:
-        st.session_state.popular_movies = get_popular_movies(page=1)
-    if 'popular_page' not in st.session_state:
-        st.session_state.popular_page = 1
+        st.session_state.movie_checklist = user.get("movie_checklist", {})
+    if 'popular_feed' not in st.session_state:
+        st.session_state.popular_feed = PopularFeed(tmdb)
     if 'notifications_shown' not in st.session_state:
         st.session_state.notifications_shown = False
 
     # Sync session state with file on each load
-    st.session_state.movie_checklist = creds[current_user].get("movie_checklist", {})
+    st.session_state.movie_checklist = user.get("movie_checklist", {})
 
     # Tabs
     tab1, tab2, tab3 = st.tabs(["Discover Movies", "To Watchlist", "History"])
@@ -110,6 +108,9 @@ def show_movie_checklist():
     # Discover Movies Tab
     with tab1:
         st.subheader("Search Movies")
+        # A clicked suggestion becomes the query (widget state can only be set before the widget is drawn)
+        if "pending_search" in st.session_state:
+            st.session_state.search_input = st.session_state.pop("pending_search")
         search_query = st.text_input("Enter movie title", key="search_input")
         
         suggestions = []
@@ -117,9 +118,7 @@ def show_movie_checklist():
         if search_query:
             if "search_page" not in st.session_state:
                 st.session_state.search_page = 1
-            search_results = search_movies(search_query, page=st.session_state.search_page)
-            popular_movies = get_popular_movies()
-            suggestions = get_keyword_suggestions(search_query, popular_movies + search_results)
+            suggestions = titles.suggest(search_query)
             
             col1, col2 = st.columns(2)
             with col1:
@@ -137,11 +136,30 @@ def show_movie_checklist():
             for i, suggestion in enumerate(suggestions):
                 with cols[i]:
                     if st.button(suggestion, key=f"suggest_{i}"):
-                        search_query = suggestion
+                        st.session_state.pending_search = suggestion
                         st.session_state.search_page = 1
-                        search_results = search_movies(suggestion, page=st.session_state.search_page)
+                        search_movies(suggestion, page=1)
                         st.rerun()
 
+        if search_query:
+            search_results = tmdb.cached_search(search_query, page=st.session_state.search_page)
+            # A partial title the index can complete is answered by the
+            # suggestions alone; TMDb gets whole titles, queries the index
+            # knows nothing about, later pages and explicit requests
+            partial = (st.session_state.search_page == 1 and search_query not in titles
+                       and titles.prefix_matches(search_query, 1))
+            if search_results is None and partial:
+                search_results = []
+                if st.button(f'Search TMDb for "{search_query}"', key="search_tmdb"):
+                    search_results = search_movies(search_query, page=st.session_state.search_page)
+                    titles.add(movie['title'] for movie in search_results)
+            elif search_results is None:
+                # Streamlit stops this run as soon as the box changes again, so
+                # queries typed past within the window never reach TMDb
+                time.sleep(SEARCH_DEBOUNCE)
+                search_results = search_movies(search_query, page=st.session_state.search_page)
+                titles.add(movie['title'] for movie in search_results)
+
         for movie in search_results:
             movie_id = str(movie['id'])  
             movie_details = get_movie_details(movie_id)
@@ -149,7 +167,7 @@ def show_movie_checklist():
                 col1, col2 = st.columns([1, 3])
                 with col1:
                     if movie.get('poster_path'):
-                        st.image(f"{IMAGE_BASE_URL}{movie.get('poster_path')}", width=150)
+                        st.image(images.poster_path(movie['poster_path'], 150), width=150)
                 with col2:
                     st.write(f"**Release Date:** {movie.get('release_date', 'N/A')}")
                     st.write(f"**Rating:** {movie.get('vote_average', 'N/A')}/10")
@@ -163,39 +181,21 @@ def show_movie_checklist():
                             'watched_date': None,
                             'user_rating': None
                         }
-                        update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                        add_movie(st.session_state.username, movie_id, st.session_state.movie_checklist[movie_id])
                         st.rerun()
 
         st.subheader("Popular Movies")
-        available_popular_movies = [movie for movie in st.session_state.popular_movies 
-                                   if str(movie['id']) not in st.session_state.movie_checklist]
-        
         DISPLAY_COUNT = 33
-        while len(available_popular_movies) < DISPLAY_COUNT:
-            st.session_state.popular_page += 1
-            new_movies = get_popular_movies(page=st.session_state.popular_page)
-            if not new_movies:
-                break
-            st.session_state.popular_movies.extend(new_movies)
-            available_popular_movies = [movie for movie in st.session_state.popular_movies 
-                                       if str(movie['id']) not in st.session_state.movie_checklist]
-
-        seen_ids = set()
-        unique_popular_movies = []
-        for movie in available_popular_movies:
-            movie_id = str(movie['id'])
-            if movie_id not in seen_ids:
-                seen_ids.add(movie_id)
-                unique_popular_movies.append(movie)
+        unique_popular_movies = st.session_state.popular_feed.available(st.session_state.movie_checklist, DISPLAY_COUNT)
 
         cols = st.columns(3)
-        for idx, movie in enumerate(unique_popular_movies[:DISPLAY_COUNT]):
+        for idx, movie in enumerate(unique_popular_movies):
             movie_id = str(movie['id'])
             with cols[idx % 3]:
                 st.markdown(
                     f"""
                     <div style='border: 1px solid #e0e0e0; border-radius: 5px; padding: 10px; margin: 5px; height: auto; overflow: auto;'>
-                        <img src='{IMAGE_BASE_URL}{movie.get('poster_path', '')}' width='100%' style='border-radius: 5px;'>
+                        <img src='{images.poster_url(movie['poster_path'], 250) if movie.get('poster_path') else ''}' width='100%' style='border-radius: 5px;'>
                         <h4 style='margin: 5px 0;'>{movie['title']}</h4>
                         <p style='font-size: 14px; margin: 2px 0;'>Rating: {movie.get('vote_average', 'N/A')}/10</p>
                         <p style='font-size: 14px; margin: 2px 0; margin-top: 4px;'>Overview: {movie.get('overview', 'N/A')}</p>
@@ -212,30 +212,36 @@ def show_movie_checklist():
                         'watched_date': None,
                         'user_rating': None
                     }
-                    update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                    add_movie(st.session_state.username, movie_id, st.session_state.movie_checklist[movie_id])
                     st.rerun()
 
     # To Watchlist Tab
     with tab2:
         unwatched_movies = {k: v for k, v in st.session_state.movie_checklist.items() if not v['watched']}
         if unwatched_movies:
+            # Runtime and genres, filled in by the hydrate.py job
+            movie_details = get_movies(unwatched_movies)
             for movie_id, movie_info in unwatched_movies.items():
                 col1, col2, col3, col4, col5 = st.columns([1, 4, 1, 1, 2])
                 with col1:
                     if movie_info.get('poster'):
-                        st.image(f"{IMAGE_BASE_URL}{movie_info['poster']}", width=50)
+                        st.image(images.poster_path(movie_info['poster'], 50), width=50)
                 with col2:
                     st.write(f"{movie_info['title']} ({movie_info.get('rating', 'N/A')}/10)")
+                    details = movie_details.get(movie_id, {})
+                    extras = [f"{details['runtime']} min" if details.get('runtime') else None, details.get('genres')]
+                    if any(extras):
+                        st.caption(" · ".join(extra for extra in extras if extra))
                 with col3:
                     if st.button("✔️", key=f"watch_{movie_id}", help="Add to history"):
                         st.session_state.movie_checklist[movie_id]['watched'] = True
                         st.session_state.movie_checklist[movie_id]['watched_date'] = datetime.now().strftime("%b %d, %Y")
-                        update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                        mark_watched(st.session_state.username, movie_id, st.session_state.movie_checklist[movie_id]['watched_date'])
                         st.rerun()
                 with col4:
                     if st.button("✖️", key=f"remove_{movie_id}", help="Remove from list"):
                         del st.session_state.movie_checklist[movie_id]
-                        update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                        remove_movie(st.session_state.username, movie_id)
                         st.rerun()
                 with col5:
                     share_toggle_key = f"show_share_unwatch_{movie_id}"
@@ -244,15 +250,13 @@ def show_movie_checklist():
                     if st.button("👥", key=f"share_unwatch_{movie_id}", help="Share with your friends"):
                         st.session_state[share_toggle_key] = not st.session_state[share_toggle_key]
                     if st.session_state[share_toggle_key]:
-                        friends = [u for u in creds.keys() if u != current_user]
-                        friend = st.selectbox(f"Share '{movie_info['title']}' with:", friends, key=f"friend_select_unwatch_{movie_id}")
+                        friends = [u for u in list_usernames() if u != current_user]
+                        selected_friends = st.multiselect(f"Share '{movie_info['title']}' with:", friends, key=f"friend_select_unwatch_{movie_id}")
                         custom_message = st.chat_input("Send a message", key=f"chat_unwatch_{movie_id}")
-                        if custom_message:
-                            friend_notifications = creds.get(friend, {}).get("notifications", [])
+                        if custom_message and selected_friends:
                             message_to_send = f"{current_user} shared '{movie_info['title']}' with you: {custom_message}"
-                            friend_notifications.append({"message": message_to_send, "read": False})
-                            update_user_profile(friend, notifications=friend_notifications)
-                            st.success(f"Shared '{movie_info['title']}' with {friend}!")
+                            delivered = push_notifications(selected_friends, message_to_send)
+                            st.success(f"Shared '{movie_info['title']}' with {', '.join(delivered)}!")
                             st.session_state[share_toggle_key] = False
                             st.rerun()
     # History Tab
@@ -270,7 +274,7 @@ def show_movie_checklist():
                     st.write(f"Watched: {movie_info.get('watched_date', 'N/A')}")
                 with col2:
                     if movie_info.get('poster'):
-                        st.image(f"{IMAGE_BASE_URL}{movie_info['poster']}", width=50)
+                        st.image(images.poster_path(movie_info['poster'], 50), width=50)
                 with col3:
                     st.write(f"{movie_info['title']}")
                     user_rating = movie_info.get('user_rating', None)
@@ -281,7 +285,7 @@ def show_movie_checklist():
                 with col4:
                     if st.button("✖️", key=f"remove_{movie_id}", help="Remove from list"):
                         del st.session_state.movie_checklist[movie_id]
-                        update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                        remove_movie(st.session_state.username, movie_id)
                         st.rerun()
                 with col6:
                     share_toggle_key = f"show_share_watch_{movie_id}"
@@ -290,15 +294,13 @@ def show_movie_checklist():
                     if st.button("👥", key=f"share_unwatch_{movie_id}", help="Share with friends"):
                         st.session_state[share_toggle_key] = not st.session_state[share_toggle_key]
                     if st.session_state[share_toggle_key]:
-                        friends = [u for u in creds.keys() if u != current_user]
-                        friend = st.selectbox(f"Share '{movie_info['title']}' with:", friends, key=f"friend_select_watch_{movie_id}")
+                        friends = [u for u in list_usernames() if u != current_user]
+                        selected_friends = st.multiselect(f"Share '{movie_info['title']}' with:", friends, key=f"friend_select_watch_{movie_id}")
                         custom_message = st.chat_input("Send a message", key=f"chat_unwatch_{movie_id}")
-                        if custom_message:
-                            friend_notifications = creds.get(friend, {}).get("notifications", [])
+                        if custom_message and selected_friends:
                             message_to_send = f"{current_user} shared '{movie_info['title']}' with you: {custom_message}"
-                            friend_notifications.append({"message": message_to_send, "read": False})
-                            update_user_profile(friend, notifications=friend_notifications)
-                            st.success(f"Shared '{movie_info['title']}' with {friend}!")
+                            delivered = push_notifications(selected_friends, message_to_send)
+                            st.success(f"Shared '{movie_info['title']}' with {', '.join(delivered)}!")
                             st.session_state[share_toggle_key] = False
                             st.rerun()
                 with col5:
@@ -313,7 +315,7 @@ def show_movie_checklist():
                             new_rating = [k for k, v in emoji_ratings.items() if v == selected_emoji][0]
                             if st.button("Submit", key=f"submit_rating_{movie_id}"):
                                 st.session_state.movie_checklist[movie_id]['user_rating'] = new_rating
-                                update_user_profile(st.session_state.username, movie_checklist=st.session_state.movie_checklist)
+                                set_rating(st.session_state.username, movie_id, new_rating)
                                 st.session_state[rating_popover_key] = False
                                 st.success(f"Rated '{movie_info['title']}' as {selected_emoji}!")
                                 st.rerun()
@@ -1,6 +1,9 @@
 import streamlit as st #type: ignore
 import pandas as pd #type:ignore
-import pickle
+from model_registry import get_model
+from model_artifact import ArtifactError
+from scoring import INPUT_COLUMNS, encode_features, score_batch
+from image_cache import WALLPAPER_URL, get_image_cache
 
 def show_success_predictor():
     st.title(":trophy: Success Predictor")
@@ -29,17 +32,18 @@ def show_success_predictor():
             """,
             unsafe_allow_html=True
         )
-    set_background_image("https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg")
+    set_background_image(get_image_cache().background_url(WALLPAPER_URL))
 
-    # Load model and encoder
+    # Load model and encoder (shared across sessions, reloaded only when the files change)
     try:
-        with open("success_predictor_model.pkl", "rb") as f: 
-            model = pickle.load(f)
-        with open("genre_encoder.pkl", "rb") as f:  
-            encoder = pickle.load(f)
+        loaded = get_model()
+        encoder = loaded.encoder
     except FileNotFoundError:
         st.error("Model files not found in current directory. Please run predictor.py from this folder.")
         return
+    except ArtifactError as e:
+        st.error(f"Model artifact rejected: {str(e)}. Please re-run predictor.py from this folder.")
+        return
 
     # Input form
     st.subheader("Will Your Movie Be a Blockbuster?")
@@ -53,41 +57,62 @@ def show_success_predictor():
     st.markdown('<p class="footnote">*Blockbuster: Gross > $100M, IMDB ≥ 8 | Bust: Gross < $20M, IMDB < 7 | Average: Everything else</p>', unsafe_allow_html=True)
     st.write("")
 
-    with st.form("prediction_form"):
-        col1, col2 = st.columns(2)
-        with col1:
-            runtime = st.number_input("Runtime (minutes)", min_value=30.0, max_value=300.0, value=90.0, step=1.0)
-            meta_score = st.number_input("Meta Score", min_value=0.0, max_value=100.0, value=60.0, step=1.0)
-        with col2:
-            released_year = st.number_input("Released Year", min_value=1900, max_value=2025, value=2015, step=1)
-            df = pd.read_csv("imdb_top_1000.csv") 
-            df["Genre"] = df["Genre"].str.split(",").str[0].str.strip()
-            genre_options = sorted(df["Genre"].unique())
-            genre = st.selectbox("Genre", genre_options, index=genre_options.index("Comedy") if "Comedy" in genre_options else 0)
+    mode = st.radio("Prediction mode", ["Single film", "Batch (CSV upload)"], horizontal=True)
+
+    if mode == "Single film":
+        with st.form("prediction_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                runtime = st.number_input("Runtime (minutes)", min_value=30.0, max_value=300.0, value=90.0, step=1.0)
+                meta_score = st.number_input("Meta Score", min_value=0.0, max_value=100.0, value=60.0, step=1.0)
+            with col2:
+                released_year = st.number_input("Released Year", min_value=1900, max_value=2025, value=2015, step=1)
+                genre_options = loaded.genre_options
+                genre = st.selectbox("Genre", genre_options, index=genre_options.index("Comedy") if "Comedy" in genre_options else 0)
         
-        submit = st.form_submit_button("Predict Success", type="primary")
+            submit = st.form_submit_button("Predict Success", type="primary")
 
-    if submit:
-        # Prepare input data
-        input_data = pd.DataFrame({
-            "Runtime": [runtime],
-            "Meta_score": [meta_score],
-            "Released_Year": [released_year],
-            "Genre": [genre]
-        })
-        genre_encoded = encoder.transform(input_data[["Genre"]])
-        genre_df = pd.DataFrame(genre_encoded, columns=encoder.get_feature_names_out(["Genre"]))
-        input_encoded = pd.concat([input_data[["Runtime", "Meta_score", "Released_Year"]], genre_df], axis=1)
+        if submit:
+            # Prepare input data
+            input_data = pd.DataFrame({
+                "Runtime": [runtime],
+                "Meta_score": [meta_score],
+                "Released_Year": [released_year],
+                "Genre": [genre]
+            })
+            input_encoded = encode_features(input_data, encoder, loaded.feature_names)
 
-        # Predict
-        try:
-            prediction = model.predict(input_encoded)[0]
-            if prediction == "Hit":
-                st.success(f"Predicted Success: **{prediction}** 🎉")
-            elif prediction == "Flop":
-                st.error(f"Predicted Success: **{prediction}** 😞")
+            # Predict
+            try:
+                prediction = loaded.forest.predict(input_encoded)[0]
+                if prediction == "Hit":
+                    st.success(f"Predicted Success: **{prediction}** 🎉")
+                elif prediction == "Flop":
+                    st.error(f"Predicted Success: **{prediction}** 😞")
+                else:
+                    st.warning(f"Predicted Success: **{prediction}** 🤔")
+                #st.write(f"Based on: Runtime={runtime} min, Meta Score={meta_score}, Year={released_year}, Genre={genre}")
+            except Exception as e:
+                st.error(f"Prediction failed: {str(e)}")
+    else:
+        # Score a whole slate of candidate films from an uploaded CSV
+        st.write(f"Upload a CSV with the columns: {', '.join(INPUT_COLUMNS)}. IMDB-style values such as \"142 min\" or \"Crime, Drama\" are accepted.")
+        uploaded_file = st.file_uploader("Upload candidate films (CSV)", type=["csv"])
+        if uploaded_file is not None:
+            try:
+                results = score_batch(pd.read_csv(uploaded_file), loaded.forest, encoder)
+            except Exception as e:
+                st.error(f"Batch prediction failed: {str(e)}")
             else:
-                st.warning(f"Predicted Success: **{prediction}** 🤔")
-            #st.write(f"Based on: Runtime={runtime} min, Meta Score={meta_score}, Year={released_year}, Genre={genre}")
-        except Exception as e:
-            st.error(f"Prediction failed: {str(e)}")
+                st.write(f"Scored {len(results):,} films:")
+                st.dataframe(results["Predicted_Success"].value_counts().rename("Films"), use_container_width=True)
+                st.dataframe(results.head(100), hide_index=True, use_container_width=True)
+                st.download_button(
+                    label="Download Predictions as CSV",
+                    data=results.to_csv(index=False),
+                    file_name="success_predictions.csv",
+                    mime="text/csv",
+                )
+
+    st.caption(f"Model {loaded.version['sha256']} · {loaded.version['model_type']} "
+               f"({loaded.version['n_estimators']} trees) · updated {loaded.version['modified']}")
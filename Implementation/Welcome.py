@@ -8,7 +8,8 @@ from GrossEarnings import show_gross_earnings
 from GlobalTrend import show_global_trends 
 from MovieChecklist import show_movie_checklist
 from SucessPredictor import show_success_predictor
-from auth import load_credentials, check_login, register_user, update_user_profile
+from auth import get_user, check_login, register_user, update_user_profile
+from image_cache import WALLPAPER_URL, get_image_cache
 
 import warnings
 
@@ -61,7 +62,7 @@ def welcome():
             """,
             unsafe_allow_html=True
         )
-    set_background_image("https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg")
+    set_background_image(get_image_cache().background_url(WALLPAPER_URL))
 
     st.write(f"Today's Date: {datetime.now().strftime('%B %d, %Y')}")
     st.markdown("""
@@ -119,14 +120,13 @@ def show_profile():
                 """,
                 unsafe_allow_html=True
             )
-        set_background_image("https://dm0qx8t0i9gc9.cloudfront.net/thumbnails/video/HjBdmP0Asleresbeo/67498616eb475b39c79d09e7-ovq5u486qu_thumbnail-1080_05.png")
+        set_background_image(get_image_cache().background_url("https://dm0qx8t0i9gc9.cloudfront.net/thumbnails/video/HjBdmP0Asleresbeo/67498616eb475b39c79d09e7-ovq5u486qu_thumbnail-1080_05.png"))
 
         if "logged_in" not in st.session_state or not st.session_state.logged_in:
             st.error("Please log in to view or edit your profile.")
             return
 
-        creds = load_credentials()
-        user_info = creds[st.session_state.username]
+        user_info = get_user(st.session_state.username, notifications=False)
 
         if "show_checklist" not in st.session_state:
             st.session_state.show_checklist = False
@@ -229,8 +229,7 @@ else:
                 if check_login(username, password):
                     st.session_state.logged_in = True
                     st.session_state.username = username
-                    creds = load_credentials()
-                    st.session_state.movie_checklist = creds[username]["movie_checklist"]
+                    st.session_state.movie_checklist = get_user(username, notifications=False)["movie_checklist"]
                     st.session_state.notifications_shown = False  
                     st.success(f"Welcome, {username}!")
                     st.rerun()
@@ -277,7 +276,7 @@ if not st.session_state.logged_in:
                 """,
                 unsafe_allow_html=True
             )
-        set_background_image("https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg")
+        set_background_image(get_image_cache().background_url(WALLPAPER_URL))
         st.markdown(
         """
         <style>
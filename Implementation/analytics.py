@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+def top_by_value(frame, bridge, label, value='Gross (M)', n=10):
+    # Totals, film counts and top n per bridge label (actor, director, ...) in one pass.
+    # frame must be a row subset of the frame the bridge was built from.
+    rows, codes = bridge.pairs(frame.index)
+    size = len(bridge.categories)
+    weights = frame[value].to_numpy()[frame.index.get_indexer(rows)]
+    totals = np.bincount(codes, weights=weights, minlength=size)
+    counts = np.bincount(codes, minlength=size)
+    # Labels that appear in the slice, highest total first (ties in label order)
+    present = np.flatnonzero(counts)
+    top = present[np.argsort(-totals[present], kind='stable')[:n]]
+    return pd.DataFrame({
+        label: bridge.categories.take(top),
+        value: totals[top],
+        'Movie Count': counts[top]
+    })
+
+class YearRollup:
+    # Per-year sum, count and argmax row of a value column.
+    # Rollups of disjoint slices of the same frame can be combined with combine(),
+    # and lookups by year are O(1) through the year -> position dict.
+    def __init__(self, years, sums, counts, max_values, max_rows):
+        self.years = years
+        self.sums = sums
+        self.counts = counts
+        self.max_values = max_values
+        self.max_rows = max_rows
+        self.positions = {int(year): pos for pos, year in enumerate(years)}
+
+    @classmethod
+    def build(cls, frame, year='Released_Year', value='Gross (M)'):
+        years = frame[year].to_numpy()
+        values = frame[value].to_numpy(dtype=float)
+        rows = frame.index.to_numpy()
+        unique_years, inverse = np.unique(years, return_inverse=True)
+        sums = np.bincount(inverse, weights=values, minlength=len(unique_years))
+        counts = np.bincount(inverse, minlength=len(unique_years))
+        # Last entry of each year after sorting by (year, value, -row) is the
+        # maximum, with ties going to the first row like groupby().idxmax()
+        order = np.lexsort((-rows, values, inverse))
+        last = np.r_[np.flatnonzero(np.diff(inverse[order])), len(order) - 1] if len(order) else order
+        best = order[last]
+        return cls(unique_years, sums, counts, values[best], rows[best])
+
+    def combine(self, other):
+        years = np.union1d(self.years, other.years)
+        sums = np.zeros(len(years))
+        counts = np.zeros(len(years), dtype=np.int64)
+        max_values = np.full(len(years), -np.inf)
+        max_rows = np.zeros(len(years), dtype=np.int64)
+        for part in (self, other):
+            pos = np.searchsorted(years, part.years)
+            sums[pos] += part.sums
+            counts[pos] += part.counts
+            better = part.max_values > max_values[pos]
+            max_values[pos[better]] = part.max_values[better]
+            max_rows[pos[better]] = part.max_rows[better]
+        return YearRollup(years, sums, counts, max_values, max_rows)
+
+    def lookup(self, year):
+        # Position of the clicked year, falling back to the nearest year with data
+        pos = self.positions.get(int(round(year)))
+        if pos is None and len(self.years):
+            pos = int(np.abs(self.years - year).argmin())
+        return pos
+
+    def totals(self, year='Released_Year', value='Gross (M)'):
+        return pd.DataFrame({year: self.years, value: self.sums})
+
+_rollups = OrderedDict()
+_rollups_lock = threading.Lock()
+
+def year_rollup(frame, year='Released_Year', value='Gross (M)', max_entries=64):
+    # Rollups are cached on the exact slice (rows, years and values), so reruns
+    # and click events with unchanged filters reuse the previous result.
+    digest = hashlib.blake2b(digest_size=16)
+    for column in (frame.index.to_numpy(), frame[year].to_numpy(), frame[value].to_numpy(dtype=float)):
+        digest.update(np.ascontiguousarray(column).tobytes())
+    key = (year, value, digest.hexdigest())
+    with _rollups_lock:
+        rollup = _rollups.get(key)
+        if rollup is not None:
+            _rollups.move_to_end(key)
+            return rollup
+    rollup = YearRollup.build(frame, year, value)
+    with _rollups_lock:
+        _rollups[key] = rollup
+        if len(_rollups) > max_entries:
+            _rollups.popitem(last=False)
+    return rollup
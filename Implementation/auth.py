@@ -1,45 +1,40 @@
-import json
-import os
-
-CREDENTIALS_FILE = "users.json"
-
-if not os.path.exists(CREDENTIALS_FILE):
-    with open(CREDENTIALS_FILE, "w") as f:
-        json.dump({"admin": {
-            "password": "123",
-            "full_name": "Admin User",
-            "dob": None,
-            "email": "admin@example.com",
-            "avatar_path": None,
-            "movie_checklist": {},
-            "notifications": []
-        }}, f)
+import threading
+from user_store import DB_FILE, INBOX_PAGE_SIZE, LEGACY_FILE, UserStore
+
+CREDENTIALS_FILE = LEGACY_FILE
+DATABASE_FILE = DB_FILE
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    # Opened on first use; the first open also imports users.json
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UserStore(DATABASE_FILE, CREDENTIALS_FILE)
+    return _store
 
 def load_credentials():
-    with open(CREDENTIALS_FILE, "r") as f:
-        creds = json.load(f)
-    for username in creds:
-        if "dob" not in creds[username]:
-            creds[username]["dob"] = None
-        if "movie_checklist" not in creds[username]:  
-            creds[username]["movie_checklist"] = {}
-        if "notifications" not in creds[username]:
-            creds[username]["notifications"] = []
-    return creds
+    return get_store().all_users()
+
+def get_user(username, notifications=True):
+    # One user's record (a copy), or None; served from the in-process snapshot.
+    # notifications=False skips reading the user's notification history.
+    return get_store().get_user(username, notifications)
+
+def list_usernames():
+    return get_store().usernames()
 
 def save_credentials(creds):
-    with open(CREDENTIALS_FILE, "w") as f:
-        json.dump(creds, f)
+    get_store().replace_all(creds)
 
 def check_login(username, password):
-    creds = load_credentials()
-    return username in creds and creds[username]["password"] == password
+    return get_store().check_password(username, password)
 
 def register_user(username, password, full_name, email):
-    creds = load_credentials()
-    if username in creds:
-        return False
-    creds[username] = {
+    return get_store().create_user(username, {
         "password": password,
         "full_name": full_name,
         "dob": None,
@@ -47,27 +42,58 @@ def register_user(username, password, full_name, email):
         "avatar_path": None,
         "movie_checklist": {},
         "notifications": []
-    }
-    save_credentials(creds)
-    return True
+    })
 
 def update_user_profile(username, full_name=None, dob=None, email=None, password=None, avatar_path=None, movie_checklist=None, notifications=None):
-    creds = load_credentials()
-    if username not in creds:
-        return False
+    fields = {}
     if full_name is not None:
-        creds[username]["full_name"] = full_name
+        fields["full_name"] = full_name
     if dob is not None:
-        creds[username]["dob"] = dob
+        fields["dob"] = dob
     if email is not None:
-        creds[username]["email"] = email
-    if password: 
-        creds[username]["password"] = password
+        fields["email"] = email
+    if password:
+        fields["password"] = password
     if avatar_path is not None:
-        creds[username]["avatar_path"] = avatar_path
+        fields["avatar_path"] = avatar_path
     if movie_checklist is not None:
-        creds[username]["movie_checklist"] = movie_checklist
+        fields["movie_checklist"] = movie_checklist
     if notifications is not None:
-        creds[username]["notifications"] = notifications
-    save_credentials(creds)
-    return True
\ No newline at end of file
+        fields["notifications"] = notifications
+    return get_store().update_user(username, **fields)
+
+def add_movie(username, movie_id, entry):
+    return get_store().add_movie(username, movie_id, entry)
+
+def mark_watched(username, movie_id, watched_date):
+    return get_store().mark_watched(username, movie_id, watched_date)
+
+def set_rating(username, movie_id, user_rating):
+    return get_store().set_rating(username, movie_id, user_rating)
+
+def remove_movie(username, movie_id):
+    return get_store().remove_movie(username, movie_id)
+
+def get_movies(movie_ids):
+    # Shared film details (runtime, genres, ...) kept up to date by hydrate.py
+    return get_store().get_movies(movie_ids)
+
+def push_notification(username, message):
+    return get_store().push_notification(username, message)
+
+def push_notifications(recipients, message):
+    # Delivers one message to every recipient in a single transaction
+    return get_store().push_notifications(recipients, message)
+
+def unread_count(username):
+    return get_store().unread_count(username)
+
+def get_inbox(username, limit=INBOX_PAGE_SIZE, before=None):
+    # Newest-first page of notifications; pass the last id seen as `before`
+    return get_store().inbox(username, limit, before)
+
+def mark_all_read(username):
+    get_store().mark_all_read(username)
+
+def clear_notifications(username):
+    get_store().clear_notifications(username)
@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+import timeit
+import pandas as pd # type: ignore
+
+# Run from Implementation: python benchmarks/bench_parse_duration.py
+sys.path[:0] = [os.getcwd(), os.path.join(os.getcwd(), "tests")]
+from dataset import NETFLIX_FILE, parse_duration  # noqa: E402
+from legacy import parse_duration_apply  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs row-wise Netflix duration parsing.")
+    parser.add_argument("--scale", type=int, default=10, help="times the duration column is repeated")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    durations = pd.read_csv(NETFLIX_FILE, usecols=["duration"])["duration"]
+    durations = pd.concat([durations] * args.scale, ignore_index=True)
+    print(f"{len(durations)} durations, best of {args.repeat}:")
+    results = {}
+    for name, parse in [("apply", parse_duration_apply), ("vectorized", parse_duration)]:
+        results[name] = min(timeit.repeat(lambda: parse(durations), number=1, repeat=args.repeat))
+        print(f"  {name:<10} {results[name] * 1000:8.1f} ms")
+    print(f"Speedup: {results['apply'] / results['vectorized']:.1f}x")
+
+if __name__ == "__main__":
+    main()
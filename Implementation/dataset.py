@@ -0,0 +1,263 @@
+import os
+import threading
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from filters import FilterEngine
+
+try:
+    import pyarrow as pa # type: ignore
+    import pyarrow.feather as feather # type: ignore
+except ImportError:
+    pa = None
+    feather = None
+
+IMDB_FILE = "imdb_top_1000.csv"
+NETFLIX_FILE = "netflix_titles.csv"
+
+# A season has no fixed runtime, so TV shows are counted as 10 hours per season
+MINUTES_PER_SEASON = 10 * 60
+
+RATING_MAPPING = {
+    'TV-Y': 'Kids',
+    'TV-Y7': 'Kids',
+    'TV-Y7-FV': 'Kids',
+    'TV-G': 'Kids',
+    'G': 'Kids',
+    'PG': 'Family',
+    'TV-PG': 'Family',
+    'PG-13': 'Teen',
+    'TV-14': 'Teen',
+    'R': 'Adult',
+    'TV-MA': 'Adult',
+    'NC-17': 'Adult',
+    'NR': 'Adult',
+    'UR': 'Adult'
+}
+
+# Cleaned frames shared by every page, keyed on the source path.
+# Each entry remembers the file stamp it was built from so an edited CSV is reloaded.
+_cache = {}
+_lock = threading.RLock()
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _cached(path, builder):
+    key = (builder.__name__, os.path.abspath(path))
+    stamp = _file_stamp(path)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, builder(path))
+            _cache[key] = entry
+    return entry[1]
+
+def _clean_imdb(path):
+    df = pd.read_csv(path)
+
+    # Handling missing values
+    df['Certificate'] = df['Certificate'].fillna('Unrated')
+    df['Meta_score'] = df['Meta_score'].fillna(df['Meta_score'].mode()[0])
+    df['Gross'] = df['Gross'].str.replace(',', '').fillna(0).astype(float) / 1e6
+
+    # Change release year and runtime to numeric
+    df['Released_Year'] = pd.to_numeric(df['Released_Year'], errors='coerce')
+    df = df.dropna(subset=['Released_Year'])
+    df['Released_Year'] = df['Released_Year'].astype(int)
+    df['Runtime'] = df['Runtime'].str.extract(r'(\d+)', expand=False).astype(float)
+
+    # First listed genre, used by the success predictor
+    df['Genre'] = df['Genre'].astype(str)
+    df['Main_Genre'] = df['Genre'].str.split(',').str[0].str.strip()
+
+    df = df.rename(columns={'Runtime': 'Runtime (min)', 'Gross': 'Gross (M)'})
+    return df.reset_index(drop=True)
+
+def load_imdb(path=IMDB_FILE):
+    # The same frame object is returned to every caller, so treat it as read-only
+    # and derive filtered copies instead of assigning into it.
+    return _cached(path, _clean_imdb)
+
+class Bridge:
+    # Normalized form of a multi-valued column such as "Action, Crime, Drama".
+    # Each distinct value gets an integer code (codes follow sorted label order)
+    # and the title -> value pairs are kept as two parallel int32 arrays, so
+    # filters and group-bys join on integers instead of re-splitting strings.
+    def __init__(self, values, sep=','):
+        values = pd.Series(values, dtype=object).reset_index(drop=True)
+        exploded = values.str.split(sep).explode().str.strip()
+        self._index(exploded, len(values))
+
+    @classmethod
+    def from_columns(cls, frame, columns):
+        # One value per column instead of a separated string, e.g. Star1..Star4 or Director
+        bridge = cls.__new__(cls)
+        stacked = frame[columns].reset_index(drop=True).stack()
+        exploded = pd.Series(stacked.to_numpy(dtype=object), index=stacked.index.get_level_values(0))
+        bridge._index(exploded.str.strip(), len(frame))
+        return bridge
+
+    def _index(self, exploded, n_rows):
+        exploded = exploded[exploded.notna() & (exploded != '')]
+        codes, categories = pd.factorize(exploded, sort=True)
+        self.categories = categories
+        self.rows = exploded.index.to_numpy(dtype=np.int32)
+        self.codes = codes.astype(np.int32)
+        self.n_rows = n_rows
+        self._bitmaps = None
+
+    def codes_for(self, labels):
+        codes = self.categories.get_indexer(list(labels))
+        return codes[codes >= 0]
+
+    def pairs(self, row_index=None, labels=None):
+        # (rows, codes) pairs restricted to the given frame rows and/or labels
+        keep = np.ones(len(self.rows), dtype=bool)
+        if row_index is not None:
+            row_mask = np.zeros(self.n_rows, dtype=bool)
+            row_mask[np.asarray(row_index)] = True
+            keep &= row_mask[self.rows]
+        if labels is not None:
+            keep &= np.isin(self.codes, self.codes_for(labels))
+        return self.rows[keep], self.codes[keep]
+
+    def bitmaps(self):
+        # Inverted index: one packed bit vector of rows per category, built on first use
+        if self._bitmaps is None:
+            bits = np.zeros((len(self.categories), self.n_rows), dtype=bool)
+            bits[self.codes, self.rows] = True
+            self._bitmaps = np.packbits(bits, axis=1)
+        return self._bitmaps
+
+    def mask(self, labels, mode='any'):
+        # Row mask for titles having any (OR) or all (AND) of the given labels
+        codes = self.categories.get_indexer(list(labels))
+        if mode == 'all' and (codes < 0).any():
+            return np.zeros(self.n_rows, dtype=bool)
+        selected = self.bitmaps()[codes[codes >= 0]]
+        if len(selected) == 0:
+            return np.zeros(self.n_rows, dtype=bool)
+        reduce = np.bitwise_and if mode == 'all' else np.bitwise_or
+        return np.unpackbits(reduce.reduce(selected, axis=0), count=self.n_rows).astype(bool)
+
+    def labels_in(self, row_index=None):
+        # Sorted distinct labels used by the given rows
+        _, codes = self.pairs(row_index)
+        return list(self.categories.take(np.unique(codes)))
+
+    def explode(self, frame, name, labels=None, columns=None):
+        # Equivalent of frame.assign(name=col.str.split(',')).explode(name), as an integer join.
+        # frame must be indexed by row position in the frame the bridge was built from.
+        rows, codes = self.pairs(frame.index, labels)
+        out = frame.iloc[frame.index.get_indexer(rows)]
+        if columns is not None:
+            out = out[columns]
+        return out.assign(**{name: self.categories.take(codes)})
+
+def _imdb_bridges(path):
+    df = load_imdb(path)
+    return {
+        'genre': Bridge(df['Genre']),
+        'star': Bridge.from_columns(df, ['Star1', 'Star2', 'Star3', 'Star4']),
+        'director': Bridge.from_columns(df, ['Director'])
+    }
+
+def imdb_bridges(path=IMDB_FILE):
+    return _cached(path, _imdb_bridges)
+
+def _imdb_filters(path):
+    return FilterEngine(load_imdb(path))
+
+def imdb_filters(path=IMDB_FILE):
+    return _cached(path, _imdb_filters)
+
+def parse_duration(durations, minutes_per_season=MINUTES_PER_SEASON):
+    # Vectorized parser for Netflix durations such as "90 min" or "3 Seasons".
+    # Returns (minutes, hours) float arrays; unknown units become NaN.
+    parts = pd.Series(durations, dtype=object).str.extract(r'(\d+)\D*?([a-zA-Z]+)')
+    value = parts[0].astype(float).to_numpy()
+    unit = parts[1].fillna('').str.lower().to_numpy()
+    minutes = np.select(
+        [unit == 'min', (unit == 'season') | (unit == 'seasons')],
+        [value, value * minutes_per_season],
+        default=np.nan
+    )
+    return minutes, minutes / 60
+
+def _clean_netflix(path):
+    df = pd.read_csv(path, decimal=',')
+
+    # Filling null values
+    df = df.dropna(subset=["date_added", "duration"])
+    df['rating'] = df['rating'].fillna(df['rating'].mode()[0])
+    df['country'] = df['country'].fillna(df['country'].mode()[0])
+    df['cast'] = df['cast'].fillna('Unknown')
+    df['director'] = df['director'].fillna('Unknown')
+
+    # Change the date_added column into datetime datatype
+    df['date_added'] = pd.to_datetime(df['date_added'].str.strip(), format='%B %d, %Y', errors='coerce')
+
+    # Clean and preprocess duration
+    df['duration_minutes'], df['duration_hours'] = parse_duration(df['duration'])
+    df = df.drop(columns=['duration'])
+
+    df['rating_category'] = df['rating'].map(RATING_MAPPING)
+    return df.reset_index(drop=True)
+
+def _columnar_path(path):
+    return os.path.splitext(path)[0] + ".feather"
+
+def _load_netflix(path):
+    # Without pyarrow there is no columnar cache, just parse the CSV
+    if feather is None:
+        return _clean_netflix(path)
+
+    # The cache records the stamp of the CSV it was built from and is rebuilt
+    # as soon as the source changes.
+    cache_path = _columnar_path(path)
+    source_stamp = ("%d:%d" % _file_stamp(path)).encode()
+    if os.path.exists(cache_path):
+        try:
+            table = feather.read_table(cache_path, memory_map=True)
+            if (table.schema.metadata or {}).get(b"source_stamp") == source_stamp:
+                return table.to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            pass
+
+    df = _clean_netflix(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_stamp": source_stamp})
+    tmp_path = "%s.%d.tmp" % (cache_path, os.getpid())
+    try:
+        # Uncompressed so later loads can memory-map the columns directly
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+def load_netflix(path=NETFLIX_FILE):
+    # Same sharing rules as load_imdb: the returned frame must not be modified.
+    return _cached(path, _load_netflix)
+
+def _netflix_bridges(path):
+    df = load_netflix(path)
+    return {
+        'country': Bridge(df['country']),
+        'genre': Bridge(df['listed_in']),
+        'cast': Bridge(df['cast'])
+    }
+
+def netflix_bridges(path=NETFLIX_FILE):
+    return _cached(path, _netflix_bridges)
+
+def _netflix_filters(path):
+    return FilterEngine(load_netflix(path))
+
+def netflix_filters(path=NETFLIX_FILE):
+    return _cached(path, _netflix_filters)
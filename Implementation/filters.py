@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+class FilterEngine:
+    # Row filtering over a shared, read-only frame.
+    # Range predicates use a per-column sorted index (binary search instead of a
+    # full comparison scan) and every predicate mask is kept in a small LRU, so a
+    # rerun only re-evaluates the predicate whose value actually changed.
+    def __init__(self, df, max_masks=128):
+        self.df = df
+        self.n_rows = len(df)
+        self.max_masks = max_masks
+        self._sorted = {}
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sorted_index(self, column):
+        index = self._sorted.get(column)
+        if index is None:
+            values = self.df[column].to_numpy()
+            valid = np.flatnonzero(pd.notna(values))
+            order = valid[np.argsort(values[valid], kind='stable')]
+            index = (values[order], order)
+            self._sorted[column] = index
+        return index
+
+    def _cached_mask(self, key, build):
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+        mask = build()
+        mask.flags.writeable = False
+        with self._lock:
+            self.misses += 1
+            self._masks[key] = mask
+            if len(self._masks) > self.max_masks:
+                self._masks.popitem(last=False)
+        return mask
+
+    def range_mask(self, column, low=None, high=None):
+        # Rows with low <= column <= high; None leaves that side open
+        def build():
+            values, order = self._sorted_index(column)
+            start = 0 if low is None else np.searchsorted(values, low, side='left')
+            stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[order[start:stop]] = True
+            return mask
+        return self._cached_mask(('range', column, low, high), build)
+
+    def isin_mask(self, column, labels):
+        labels = tuple(sorted(labels))
+        def build():
+            return self.df[column].isin(labels).to_numpy()
+        return self._cached_mask(('isin', column, labels), build)
+
+    def mask(self, ranges=None, isin=None):
+        # Combined mask for {column: (low, high)} ranges and {column: labels} selections.
+        # Empty selections are treated as "no filter", like the sidebar multiselects.
+        mask = np.ones(self.n_rows, dtype=bool)
+        for column, (low, high) in (ranges or {}).items():
+            mask &= self.range_mask(column, low, high)
+        for column, labels in (isin or {}).items():
+            if labels:
+                mask &= self.isin_mask(column, labels)
+        return mask
+
+    def apply(self, ranges=None, isin=None):
+        return self.df[self.mask(ranges, isin)]
@@ -0,0 +1,64 @@
+import numpy as np # type: ignore
+
+def export_forest(model):
+    # Flatten every tree of a fitted RandomForestClassifier into contiguous node
+    # arrays. Child indices are global, and leaves point at themselves so the
+    # evaluator can step all trees in lockstep without branching.
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        leaf = tree.children_left == -1
+        node_ids = np.arange(tree.node_count)
+        value = tree.value[:, 0, :].astype(np.float64)
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append((np.where(leaf, node_ids, tree.children_left) + offset).astype(np.int32))
+        rights.append((np.where(leaf, node_ids, tree.children_right) + offset).astype(np.int32))
+        values.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "depth": np.array(max(e.tree_.max_depth for e in model.estimators_), dtype=np.int32),
+        "classes": np.array([str(c) for c in model.classes_]),
+        "feature_names": np.array([str(f) for f in getattr(model, "feature_names_in_", [])])
+    }
+
+class FlatForest:
+    # Array-based evaluator with the same predict/predict_proba interface as the
+    # sklearn model, without its per-call validation and joblib dispatch.
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"])
+        self.classes_ = arrays["classes"].astype(object)
+        self.feature_names_in_ = arrays["feature_names"].astype(object)
+        self.n_estimators = len(self.roots)
+        self.model_sha256 = str(arrays["model_sha256"]) if "model_sha256" in arrays else None
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(export_forest(model))
+
+    def predict_proba(self, X):
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
@@ -0,0 +1,47 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from auth import get_store
+from tmdb import POOL_SIZE, get_client
+
+HYDRATE_WORKERS = 8
+BATCH_SIZE = 100
+MAX_AGE_DAYS = 7
+
+def hydrate(store, client, workers=HYDRATE_WORKERS, max_age_days=MAX_AGE_DAYS, batch_size=BATCH_SIZE):
+    # Refreshes runtime, genres, rating and poster for every film on any
+    # checklist. Ids come deduplicated from the shared movies table, details
+    # are fetched from TMDb itself (bypassing fresh or stale cache entries,
+    # which are overwritten) with at most `workers` requests in flight, and
+    # each batch is written in one transaction.
+    movie_ids = store.movies_to_hydrate(max_age_days)
+    updated = failed = 0
+    with ThreadPoolExecutor(max_workers=min(workers, POOL_SIZE)) as pool:
+        for start in range(0, len(movie_ids), batch_size):
+            batch = movie_ids[start:start + batch_size]
+            details = {}
+            fetched = pool.map(lambda movie_id: client.movie_details(movie_id, force=True), batch)
+            for movie_id, data in zip(batch, fetched):
+                if data:
+                    details[movie_id] = data
+                else:
+                    failed += 1
+            if details:
+                updated += store.update_movies(details)
+    return {"candidates": len(movie_ids), "updated": updated, "failed": failed}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh TMDb details for every film on a user checklist.")
+    parser.add_argument("--workers", type=int, default=HYDRATE_WORKERS,
+                        help=f"concurrent TMDb requests (capped at {POOL_SIZE})")
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS,
+                        help="refresh films hydrated longer ago than this (0 refreshes all)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="films written per transaction")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    result = hydrate(get_store(), get_client(), args.workers, args.max_age_days, args.batch_size)
+    print(f"Hydrated {result['updated']} of {result['candidates']} films "
+          f"({result['failed']} failed) in {time.perf_counter() - started:.1f}s.")
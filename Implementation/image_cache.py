@@ -0,0 +1,186 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image #type:ignore
+from tmdb import CONNECT_TIMEOUT, IMAGE_BASE_URL, IMAGE_ORIGIN, READ_TIMEOUT, get_client
+
+# Source size the thumbnails are made from
+POSTER_BASE_URL = f"{IMAGE_ORIGIN}/w500"
+WALLPAPER_URL = "https://wallpapers.com/images/featured/movie-9pvmdtvz4cb0xl37.jpg"
+
+# Served by Streamlit as app/static/images/<file> (server.enableStaticServing)
+CACHE_DIR = os.path.join("static", "images")
+STATIC_URL = "app/static/images"
+INDEX_FILE = "image_cache.db"
+MAX_BYTES = 100 * 1024 * 1024
+# Thumbnails stored per poster: twice the widths the pages display (50px and
+# 150px images, ~250px popular cards) so they stay sharp on HiDPI screens
+POSTER_WIDTHS = (100, 300, 500)
+WALLPAPER_WIDTH = 1920
+JPEG_QUALITY = 85
+# A failed download is not retried for this long
+RETRY_FAILED_AFTER = 600
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS images (
+        url TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        file TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL,
+        PRIMARY KEY (url, width)
+    )""",
+    "CREATE INDEX IF NOT EXISTS images_accessed ON images(accessed)"
+]
+
+def _thumbnail(image, width):
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+class ImageCache:
+    # Posters and backgrounds downloaded once per process group and kept on
+    # disk as resized JPEGs named by their content hash, so the browser can
+    # cache them indefinitely and never pulls a full-size image from the origin.
+    # A lookup never waits on the network: on a miss the origin URL is
+    # returned while the download runs in the background, and the next rerun
+    # gets the local copy. Files are held under max_bytes, least recently used
+    # evicted first.
+    def __init__(self, session, cache_dir=CACHE_DIR, index_path=INDEX_FILE, max_bytes=MAX_BYTES, workers=4):
+        self.session = session
+        self.cache_dir = cache_dir
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._fetching = set()
+        self._failed = {}
+        self._downloader = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-fetch")
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _lookup(self, url, width, widths):
+        # File name of the stored thumbnail, or None after scheduling a download
+        conn = self._connect()
+        row = conn.execute("SELECT file FROM images WHERE url = ? AND width = ?", (url, width)).fetchone()
+        if row is not None and os.path.exists(os.path.join(self.cache_dir, row[0])):
+            with conn:
+                conn.execute("UPDATE images SET accessed = ? WHERE url = ? AND width = ?", (time.time(), url, width))
+            return row[0]
+        with self._lock:
+            start = url not in self._fetching and time.time() - self._failed.get(url, 0) > RETRY_FAILED_AFTER
+            if start:
+                self._fetching.add(url)
+        if start:
+            self._downloader.submit(self._download, url, widths)
+        return None
+
+    def _download(self, url, widths):
+        try:
+            response = self.session.get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content)).convert("RGB")
+            rows = []
+            for width in widths:
+                data = _thumbnail(image, width)
+                name = hashlib.sha256(data).hexdigest()[:20] + ".jpg"
+                path = os.path.join(self.cache_dir, name)
+                if not os.path.exists(path):
+                    # Written under a temporary name so a request never sees half a file
+                    tmp = f"{path}.{threading.get_ident()}.tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp, path)
+                rows.append((url, width, name, len(data), time.time()))
+            conn = self._connect()
+            with conn:
+                old = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM images WHERE url = ? AND width IN "
+                                   f"({', '.join('?' * len(widths))})", (url, *widths)).fetchone()[0]
+                conn.executemany("INSERT OR REPLACE INTO images (url, width, file, size, accessed) "
+                                 "VALUES (?, ?, ?, ?, ?)", rows)
+            with self._lock:
+                self._size += sum(row[3] for row in rows) - old
+            if self._size > self.max_bytes:
+                self.evict()
+        except Exception:
+            with self._lock:
+                self._failed[url] = time.time()
+        finally:
+            with self._lock:
+                self._fetching.discard(url)
+
+    def evict(self):
+        # Least recently used first, down to 90% of the budget; a file shared by
+        # identical images under other URLs stays until its last row goes
+        target = int(self.max_bytes * 0.9)
+        conn = self._connect()
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+            removed = 0
+            victims = []
+            files = set()
+            for url, width, name, size in conn.execute("SELECT url, width, file, size FROM images ORDER BY accessed"):
+                if total - removed <= target:
+                    break
+                victims.append((url, width))
+                files.add(name)
+                removed += size
+            conn.executemany("DELETE FROM images WHERE url = ? AND width = ?", victims)
+            kept = {row[0] for row in conn.execute("SELECT DISTINCT file FROM images")} if files else set()
+        for name in files - kept:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        with self._lock:
+            self._size = total - removed
+
+    def _poster(self, poster, width):
+        # Smallest stored thumbnail at least twice the displayed width
+        width = next((w for w in POSTER_WIDTHS if w >= 2 * width), POSTER_WIDTHS[-1])
+        return self._lookup(POSTER_BASE_URL + poster, width, POSTER_WIDTHS)
+
+    def poster_path(self, poster, width):
+        # For st.image: the local thumbnail if cached, else the origin URL
+        name = self._poster(poster, width)
+        return os.path.join(self.cache_dir, name) if name else IMAGE_BASE_URL + poster
+
+    def poster_url(self, poster, width):
+        # For <img> tags: the static URL of the local thumbnail if cached, else the origin URL
+        name = self._poster(poster, width)
+        return f"{STATIC_URL}/{name}" if name else IMAGE_BASE_URL + poster
+
+    def background_url(self, url, width=WALLPAPER_WIDTH):
+        # For CSS backgrounds: any image URL, served locally once downloaded
+        name = self._lookup(url, width, (width,))
+        return f"{STATIC_URL}/{name}" if name else url
+
+# Shared by every session; downloads reuse the TMDb client's pooled session
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_image_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache(get_client().session)
+    return _cache
@@ -0,0 +1,152 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from forest import FlatForest, export_forest
+from scoring import NUMERIC_FEATURES
+
+# Served model: the flattened forest as plain .npy arrays (memory-mapped, so every
+# Streamlit worker shares the same pages) plus a manifest that is checked before use.
+ARTIFACT_DIR = "success_predictor_model"
+MANIFEST_FILE = "manifest.json"
+FORMAT = "success-predictor-flat/1"
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "value", "roots"]
+
+class ArtifactError(ValueError):
+    pass
+
+class GenreEncoder:
+    # Stand-in for the fitted OneHotEncoder(handle_unknown="ignore"), rebuilt from
+    # the manifest's genre list so no pickle is loaded in the request path
+    def __init__(self, genres):
+        self.categories_ = [np.array(genres, dtype=object)]
+        self._index = pd.Index(genres)
+
+    def transform(self, df):
+        values = np.asarray(df, dtype=object).reshape(len(df), -1)[:, 0]
+        codes = self._index.get_indexer(pd.Index(values).astype(str))
+        encoded = np.zeros((len(codes), len(self._index)))
+        known = codes >= 0
+        encoded[np.flatnonzero(known), codes[known]] = 1.0
+        return encoded
+
+    def get_feature_names_out(self, input_features=("Genre",)):
+        return np.array([f"{input_features[0]}_{genre}" for genre in self.categories_[0]], dtype=object)
+
+def expected_feature_names(genres):
+    return NUMERIC_FEATURES + [f"Genre_{genre}" for genre in genres]
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _save_array(path, array):
+    # Running workers memory-map these files, so an existing one is never
+    # written over: identical content is left alone, anything else goes to a
+    # temporary file that replaces it (mapped readers keep the old inode)
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    data = buffer.getvalue()
+    if os.path.exists(path) and _sha256_file(path) == hashlib.sha256(data).hexdigest():
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_artifact(model, encoder, model_sha256, path=ARTIFACT_DIR, keep=2):
+    # Imported here so serving an artifact never loads sklearn
+    import sklearn # type: ignore
+    genres = [str(genre) for genre in encoder.categories_[0]]
+    arrays = export_forest(model)
+    feature_names = [str(name) for name in arrays["feature_names"]]
+    if feature_names != expected_feature_names(genres):
+        raise ArtifactError("model feature order does not match the encoder's genres")
+
+    # Arrays go in a per-model subdirectory; the manifest is swapped in last, so
+    # readers only ever see a complete artifact.
+    version = model_sha256[:12]
+    os.makedirs(os.path.join(path, version), exist_ok=True)
+    files = {}
+    for name in ARRAY_NAMES:
+        relative = f"{version}/{name}.npy"
+        _save_array(os.path.join(path, relative), np.ascontiguousarray(arrays[name]))
+        files[name] = {
+            "file": relative,
+            "sha256": _sha256_file(os.path.join(path, relative)),
+            "dtype": str(arrays[name].dtype),
+            "shape": list(arrays[name].shape)
+        }
+    manifest = {
+        "format": FORMAT,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "model_sha256": model_sha256,
+        "model_type": type(model).__name__,
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "n_estimators": len(arrays["roots"]),
+        "depth": int(arrays["depth"]),
+        "classes": [str(c) for c in arrays["classes"]],
+        "feature_names": feature_names,
+        "genres": genres,
+        "files": files
+    }
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    # Keep the previous version around for workers that are still reading it
+    versions = sorted((entry for entry in os.scandir(path) if entry.is_dir() and entry.name != version),
+                      key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[keep - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    return manifest
+
+def load_artifact(path=ARTIFACT_DIR, verify=True):
+    # Refuses artifacts with an unknown format, missing or modified arrays, or a
+    # feature layout that does not match what the app encodes.
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise ArtifactError(f"unsupported artifact format {manifest.get('format')!r} (expected {FORMAT})")
+    if manifest["feature_names"] != expected_feature_names(manifest["genres"]):
+        raise ArtifactError("feature order in the manifest does not match the genre encoding")
+
+    arrays = {}
+    for name in ARRAY_NAMES:
+        entry = manifest["files"].get(name)
+        if entry is None:
+            raise ArtifactError(f"manifest does not list the {name} array")
+        file_path = os.path.join(path, entry["file"])
+        if not os.path.exists(file_path):
+            raise ArtifactError(f"{entry['file']} is missing")
+        if verify and _sha256_file(file_path) != entry["sha256"]:
+            raise ArtifactError(f"{entry['file']} does not match its checksum (stale or modified artifact)")
+        array = np.load(file_path, mmap_mode="r", allow_pickle=False)
+        if str(array.dtype) != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ArtifactError(f"{entry['file']} has an unexpected dtype or shape")
+        arrays[name] = array
+
+    n_nodes = len(arrays["feature"])
+    if (len(arrays["roots"]) != manifest["n_estimators"]
+            or arrays["value"].shape != (n_nodes, len(manifest["classes"]))
+            or int(arrays["feature"].max()) >= len(manifest["feature_names"])
+            or max(int(arrays["left"].max()), int(arrays["right"].max())) >= n_nodes):
+        raise ArtifactError("forest arrays are inconsistent with the manifest")
+
+    arrays.update({
+        "depth": manifest["depth"],
+        "classes": np.array(manifest["classes"]),
+        "feature_names": np.array(manifest["feature_names"]),
+        "model_sha256": manifest["model_sha256"]
+    })
+    return manifest, FlatForest(arrays), GenreEncoder(manifest["genres"])
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import threading
+from datetime import datetime
+from forest import FlatForest
+from model_artifact import ARTIFACT_DIR, MANIFEST_FILE, load_artifact
+
+MODEL_FILE = "success_predictor_model.pkl"
+ENCODER_FILE = "genre_encoder.pkl"
+
+class LoadedModel:
+    # The served forest/encoder pair plus what the page needs alongside it.
+    # model is the sklearn estimator only when serving from the legacy pickles.
+    def __init__(self, model, encoder, forest, stamp, version):
+        self.model = model
+        self.encoder = encoder
+        self.forest = forest
+        self.stamp = stamp
+        self.version = version
+        self.genre_options = sorted(str(genre) for genre in encoder.categories_[0])
+        self.feature_names = list(forest.feature_names_in_)
+
+# Loaded once per process and shared by every session; reloaded when the files change on disk
+_loaded = {}
+_lock = threading.Lock()
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _load_served(artifact_path, stamp):
+    manifest, forest, encoder = load_artifact(artifact_path)
+    version = {
+        "sha256": manifest["model_sha256"][:12],
+        "modified": manifest["created"],
+        "model_type": manifest["model_type"],
+        "n_estimators": manifest["n_estimators"],
+        "classes": manifest["classes"],
+        "sklearn_version": manifest["sklearn_version"],
+        "format": manifest["format"]
+    }
+    return LoadedModel(None, encoder, forest, stamp, version)
+
+def _load_pickles(model_path, encoder_path, stamp):
+    # Legacy fallback until predictor.py has written the served artifact
+    with open(model_path, "rb") as f:
+        data = f.read()
+    model = pickle.loads(data)
+    with open(encoder_path, "rb") as f:
+        encoder = pickle.load(f)
+    model_sha256 = hashlib.sha256(data).hexdigest()
+    forest = FlatForest.from_model(model)
+    version = {
+        "sha256": model_sha256[:12],
+        "modified": datetime.fromtimestamp(stamp[0][0] / 1e9).strftime("%Y-%m-%d %H:%M"),
+        "model_type": type(model).__name__,
+        "n_estimators": getattr(model, "n_estimators", None),
+        "classes": [str(c) for c in getattr(model, "classes_", [])],
+        "sklearn_version": getattr(model, "_sklearn_version", None),
+        "format": "pickle"
+    }
+    return LoadedModel(model, encoder, forest, stamp, version)
+
+def get_model(model_path=MODEL_FILE, encoder_path=ENCODER_FILE, artifact_path=ARTIFACT_DIR):
+    # Serves the manifest-checked artifact when present, else the legacy pickles.
+    # Raises FileNotFoundError when nothing has been trained yet and
+    # model_artifact.ArtifactError when the artifact is stale or mismatched.
+    manifest_path = os.path.join(artifact_path, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        key = ("artifact", os.path.abspath(artifact_path))
+        stamp = (_file_stamp(manifest_path),)
+        load = lambda: _load_served(artifact_path, stamp)
+    else:
+        key = ("pickle", os.path.abspath(model_path), os.path.abspath(encoder_path))
+        stamp = (_file_stamp(model_path), _file_stamp(encoder_path))
+        load = lambda: _load_pickles(model_path, encoder_path, stamp)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded.stamp == stamp:
+        return loaded
+    with _lock:
+        loaded = _loaded.get(key)
+        if loaded is None or loaded.stamp != stamp:
+            try:
+                loaded = load()
+            except (EOFError, pickle.UnpicklingError):
+                # A retrain may still be writing the files; keep serving the previous model
+                if loaded is None:
+                    raise
+            else:
+                _loaded[key] = loaded
+    return loaded
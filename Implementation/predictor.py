@@ -1,69 +1,341 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+import numpy as np # type: ignore
 import pandas as pd # type: ignore
-from sklearn.model_selection import train_test_split # type: ignore
+import sklearn # type: ignore
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, StratifiedKFold, train_test_split # type: ignore
 from sklearn.ensemble import RandomForestClassifier # type: ignore
 from sklearn.preprocessing import OneHotEncoder # type: ignore
-import pickle
+from forest import FlatForest
+from model_artifact import ARTIFACT_DIR, write_artifact
+from dataset import IMDB_FILE, load_imdb
+from model_registry import MODEL_FILE, ENCODER_FILE
+from scoring import NUMERIC_FEATURES, encode_features
+
+ARTIFACTS_DIR = "artifacts"
+
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 10, 20],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", None]
+}
 
-print("Starting script...")
-
-# Load and preprocess data
-try:
-    df = pd.read_csv("imdb_top_1000.csv")
-    print("CSV loaded successfully. Shape:", df.shape)
-except FileNotFoundError:
-    print("Error: imdb_top_1000.csv not found in Implementation folder!")
-    exit(1)
-
-# Clean data
-df["Gross"] = df["Gross"].str.replace(",", "").fillna(0).astype(float) / 1e6
-df["Runtime"] = df["Runtime"].str.extract(r"(\d+)").astype(float)
-df["Released_Year"] = pd.to_numeric(df["Released_Year"], errors="coerce")
-df = df.dropna(subset=["Released_Year"])
-df["Released_Year"] = df["Released_Year"].astype(int)
-df["Meta_score"] = df["Meta_score"].fillna(df["Meta_score"].mode()[0])
-df["Genre"] = df["Genre"].str.split(",").str[0].str.strip()
-print("Data cleaned. Shape after cleaning:", df.shape)
+PARAM_DISTRIBUTIONS = {
+    "n_estimators": [50, 100, 200, 300, 400],
+    "max_depth": [None, 5, 10, 15, 20, 30],
+    "min_samples_leaf": [1, 2, 3, 4, 6, 8],
+    "min_samples_split": [2, 4, 8],
+    "max_features": ["sqrt", "log2", None]
+}
 
 # Define success categories
-def classify_success(row):
-    if row["Gross"] > 100 and row["IMDB_Rating"] >= 8.0:
-        return "Hit"
-    elif row["Gross"] < 20 and row["IMDB_Rating"] < 7.0:
-        return "Flop"
+def classify_success(df):
+    return pd.Series(np.select(
+        [(df["Gross"] > 100) & (df["IMDB_Rating"] >= 8.0),
+         (df["Gross"] < 20) & (df["IMDB_Rating"] < 7.0)],
+        ["Hit", "Flop"],
+        default="Average"
+    ), index=df.index)
+
+def load_training_data(path=IMDB_FILE):
+    df = load_imdb(path)
+    # Training uses the raw column names and the first listed genre only
+    df = df.drop(columns=["Genre"]).rename(columns={"Runtime (min)": "Runtime", "Gross (M)": "Gross", "Main_Genre": "Genre"})
+    df = df.assign(Success_Category=classify_success(df))
+    return df.reset_index(drop=True)
+
+# Film identity (title and year) plus everything the model learns from; features
+# alone collide for distinct films
+FINGERPRINT_COLUMNS = ["Series_Title"] + NUMERIC_FEATURES + ["Genre", "Success_Category"]
+
+def fingerprint_rows(df):
+    # Stable per-row hash used to spot appended films
+    return pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False).to_numpy()
+
+def reference_distribution(df):
+    # Decile bins of each numeric feature in the training rows, the baseline for drift checks
+    reference = {}
+    for col in NUMERIC_FEATURES:
+        edges = np.unique(np.quantile(df[col], np.linspace(0, 1, 11)))[1:-1]
+        counts = np.bincount(np.searchsorted(edges, df[col], side="right"), minlength=len(edges) + 1)
+        reference[col] = {"edges": edges.tolist(), "fractions": (counts / counts.sum()).tolist()}
+    return reference
+
+def population_stability(reference, df):
+    # Population stability index per feature (> 0.25 is conventionally a significant shift)
+    psi = {}
+    for col, ref in reference.items():
+        edges = np.array(ref["edges"])
+        expected = np.clip(np.array(ref["fractions"]), 1e-4, None)
+        counts = np.bincount(np.searchsorted(edges, df[col], side="right"), minlength=len(expected))
+        actual = np.clip(counts / max(counts.sum(), 1), 1e-4, None)
+        psi[col] = float(np.sum((actual - expected) * np.log(actual / expected)))
+    return psi
+
+def latest_artifact(output_dir=ARTIFACTS_DIR):
+    if not os.path.isdir(output_dir):
+        return None
+    versions = sorted(name for name in os.listdir(output_dir)
+                      if os.path.exists(os.path.join(output_dir, name, "fingerprints.npz")))
+    return os.path.join(output_dir, versions[-1]) if versions else None
+
+def _dump_atomic(obj, path):
+    # The dashboard hot-reloads these files, so never leave a half-written pickle behind
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f)
+    os.replace(tmp_path, path)
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_search(args):
+    cv = StratifiedKFold(n_splits=args.cv, shuffle=True, random_state=args.seed)
+    estimator = RandomForestClassifier(random_state=args.seed)
+    if args.search == "random":
+        return RandomizedSearchCV(estimator, PARAM_DISTRIBUTIONS, n_iter=args.n_iter, cv=cv,
+                                  n_jobs=args.n_jobs, random_state=args.seed, refit=True)
+    if args.search == "grid":
+        return GridSearchCV(estimator, PARAM_GRID, cv=cv, n_jobs=args.n_jobs, refit=True)
+    return GridSearchCV(estimator, {"n_estimators": [100]}, cv=cv, n_jobs=args.n_jobs, refit=True)
+
+def train(args):
+    print("Starting training pipeline...")
+    try:
+        df = load_training_data(args.data)
+        print("CSV loaded and cleaned successfully. Shape:", df.shape)
+    except FileNotFoundError:
+        print(f"Error: {args.data} not found in Implementation folder!")
+        exit(1)
+
+    # Encode once up front: the one-hot columns carry no label statistics, so every
+    # fold and candidate reuses the same matrix instead of re-encoding per fit.
+    y = df["Success_Category"]
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    encoder.fit(df[["Genre"]])
+    X_encoded = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder)
+    print("Features encoded. Shape of X_encoded:", X_encoded.shape)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_encoded, y, test_size=args.test_size, random_state=args.seed,
+        stratify=y if y.value_counts().min() >= 2 else None)
+
+    search = build_search(args)
+    search.fit(X_train, y_train)
+    model = search.best_estimator_
+    test_accuracy = model.score(X_test, y_test)
+    print(f"Best parameters ({args.search}, {args.cv}-fold): {search.best_params_}")
+    print(f"Cross-validation accuracy: {search.best_score_:.3f}")
+    print(f"Held-out accuracy: {test_accuracy:.3f}")
+
+    metrics = {
+        "mode": "full",
+        "search": args.search,
+        "cv_folds": args.cv,
+        "best_params": search.best_params_,
+        "cv_accuracy": float(search.best_score_),
+        "cv_accuracy_std": float(search.cv_results_["std_test_score"][search.best_index_]),
+        "test_accuracy": float(test_accuracy),
+        "reference": reference_distribution(df.loc[X_train.index])
+    }
+    fingerprints = fingerprint_rows(df)
+    model_sha256 = save_artifact(args, model, encoder, metrics, df, X_encoded.columns,
+                                 fingerprints[X_train.index], fingerprints[X_test.index])
+    if not args.no_publish:
+        publish(model, encoder, X_test, model_sha256)
+    print("Category Distribution in Training Data:")
+    print(y.value_counts())
+    print("Script completed successfully!")
+    return metrics
+
+def save_artifact(args, model, encoder, metrics, df, feature_names, train_fingerprints, test_fingerprints):
+    # Versioned artifact plus the metrics and row fingerprints that produced it
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    version_dir = os.path.join(args.output_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    _dump_atomic(model, os.path.join(version_dir, MODEL_FILE))
+    _dump_atomic(encoder, os.path.join(version_dir, ENCODER_FILE))
+    model_sha256 = _sha256(os.path.join(version_dir, MODEL_FILE))
+    np.savez(os.path.join(version_dir, "fingerprints.npz"), train=train_fingerprints, test=test_fingerprints)
+    metrics = {
+        "version": version,
+        "model_sha256": model_sha256,
+        "sklearn_version": sklearn.__version__,
+        "data_file": args.data,
+        "data_sha256": _sha256(args.data),
+        "n_rows": int(len(df)),
+        "n_train": int(len(train_fingerprints)),
+        "n_test": int(len(test_fingerprints)),
+        "n_estimators": len(model.estimators_),
+        "feature_names": list(feature_names),
+        "seed": args.seed,
+        **metrics,
+        "class_distribution": {str(k): int(v) for k, v in df["Success_Category"].value_counts().items()}
+    }
+    with open(os.path.join(version_dir, "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2, default=str)
+    print(f"Versioned artifact written to {version_dir}")
+    return model_sha256
+
+def train_incremental(args):
+    print("Starting incremental update...")
+    previous = latest_artifact(args.output_dir)
+    if previous is None:
+        print("No previous artifact found, running a full retrain.")
+        return train(args)
+    with open(os.path.join(previous, "metrics.json")) as f:
+        previous_metrics = json.load(f)
+    with open(os.path.join(previous, MODEL_FILE), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(previous, ENCODER_FILE), "rb") as f:
+        encoder = pickle.load(f)
+    with np.load(os.path.join(previous, "fingerprints.npz")) as f:
+        previous_train, previous_test = f["train"], f["test"]
+
+    df = load_training_data(args.data)
+    fingerprints = fingerprint_rows(df)
+    is_new = ~np.isin(fingerprints, np.concatenate([previous_train, previous_test]))
+    new_rows = df[is_new]
+    if new_rows.empty:
+        print(f"No new films since {previous_metrics['version']}. Nothing to do.")
+        return previous_metrics
+    print(f"{len(new_rows)} new films since {previous_metrics['version']}.")
+
+    # Drift checks decide between growing the forest and retraining from scratch
+    psi = population_stability(previous_metrics["reference"], new_rows) if len(new_rows) >= args.min_drift_rows else {}
+    reasons = []
+    if psi and max(psi.values()) > args.drift_threshold:
+        reasons.append(f"feature drift (PSI {max(psi.values()):.2f} > {args.drift_threshold})")
+    if not set(new_rows["Success_Category"]).issubset(str(c) for c in model.classes_):
+        reasons.append("a new success category appeared")
+    if len(new_rows) > args.max_new_fraction * len(df):
+        reasons.append(f"more than {args.max_new_fraction:.0%} of the films are new")
+    if reasons:
+        print(f"Full retrain needed: {'; '.join(reasons)}.")
+        return train(args)
+
+    # Unseen genres are appended after the known ones, so the columns the existing
+    # trees split on keep their positions and the encoder stays in sync with the model.
+    known_genres = [str(g) for g in encoder.categories_[0]]
+    unseen_genres = sorted(set(new_rows["Genre"]) - set(known_genres))
+    if unseen_genres:
+        print(f"Adding unseen genres to the encoder: {', '.join(unseen_genres)}")
+        encoder = OneHotEncoder(categories=[known_genres + unseen_genres], sparse_output=False, handle_unknown="ignore")
+        encoder.fit(df[["Genre"]])
+    X_encoded = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder)
+    y = df["Success_Category"]
+
+    # New films get their own held-out share; previous films keep their split
+    new_positions = np.flatnonzero(is_new)
+    if len(new_positions) > 1:
+        new_train, new_test = train_test_split(new_positions, test_size=args.test_size, random_state=args.seed)
+    else:
+        new_train, new_test = new_positions, new_positions[:0]
+    train_mask = np.isin(fingerprints, previous_train)
+    train_mask[new_train] = True
+    test_mask = np.isin(fingerprints, previous_test)
+    test_mask[new_test] = True
+
+    # warm_start keeps the fitted trees and only grows the extra ones. They are fit on
+    # all current training films so they see the new titles alongside every class.
+    n_previous = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=n_previous + args.trees_per_update, n_jobs=args.n_jobs)
+    model.fit(X_encoded[train_mask], y[train_mask])
+    model.set_params(warm_start=False, n_jobs=None)
+    # Older trees never split on appended genre columns; let them accept the wider input
+    for estimator in model.estimators_[:n_previous]:
+        estimator.n_features_in_ = model.n_features_in_
+    print(f"Grew {args.trees_per_update} trees on {int(train_mask.sum())} films ({n_previous} kept).")
+
+    X_test = X_encoded[test_mask]
+    test_accuracy = model.score(X_test, y[test_mask])
+    accuracy_drop = previous_metrics["test_accuracy"] - test_accuracy
+    print(f"Held-out accuracy: {test_accuracy:.3f} (previous {previous_metrics['test_accuracy']:.3f})")
+    if accuracy_drop > args.max_accuracy_drop:
+        print(f"Full retrain needed: held-out accuracy dropped by {accuracy_drop:.3f}.")
+        return train(args)
+
+    metrics = {
+        "mode": "incremental",
+        "parent_version": previous_metrics["version"],
+        "new_rows": int(len(new_rows)),
+        "trees_added": args.trees_per_update,
+        "unseen_genres": unseen_genres,
+        "drift_psi": psi,
+        "test_accuracy": float(test_accuracy),
+        # Drift is always measured against the last full retrain
+        "reference": previous_metrics["reference"]
+    }
+    model_sha256 = save_artifact(args, model, encoder, metrics, df, X_encoded.columns,
+                                 fingerprints[train_mask], fingerprints[test_mask])
+    if not args.no_publish:
+        publish(model, encoder, X_test, model_sha256)
+    print("Script completed successfully!")
+    return metrics
+
+def publish(model, encoder, X_test, model_sha256):
+    # Replace the served artifact: flat forest arrays plus a checked manifest.
+    # Parity is checked in memory first so a bad export never replaces the served one.
+    parity = (FlatForest.from_model(model).predict(X_test.to_numpy()) == model.predict(X_test)).all()
+    if not parity:
+        print("Error: flattened forest does not match the sklearn model! Served artifact left unchanged.")
+        exit(1)
+    manifest = write_artifact(model, encoder, model_sha256, ARTIFACT_DIR)
+    print(f"Served artifact written to {ARTIFACT_DIR}/ ({manifest['n_estimators']} trees). "
+          f"Matches sklearn predictions: {parity}")
+
+def export_pickles(args):
+    # Convert the existing success_predictor_model.pkl / genre_encoder.pkl without retraining
+    try:
+        with open(MODEL_FILE, "rb") as f:
+            model = pickle.load(f)
+        with open(ENCODER_FILE, "rb") as f:
+            encoder = pickle.load(f)
+    except FileNotFoundError:
+        print(f"Error: {MODEL_FILE} or {ENCODER_FILE} not found in Implementation folder!")
+        exit(1)
+    df = load_training_data(args.data)
+    X_encoded = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder, model.feature_names_in_)
+    publish(model, encoder, X_encoded, _sha256(MODEL_FILE))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the movie success predictor.")
+    parser.add_argument("--data", default=IMDB_FILE, help="IMDB CSV to train on")
+    parser.add_argument("--search", choices=["none", "grid", "random"], default="grid",
+                        help="hyperparameter search strategy (default: grid)")
+    parser.add_argument("--cv", type=int, default=5, help="number of cross-validation folds")
+    parser.add_argument("--n-iter", type=int, default=30, help="candidates sampled by --search random")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="worker processes (-1 uses all cores)")
+    parser.add_argument("--test-size", type=float, default=0.2, help="held-out fraction")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for splits and forests")
+    parser.add_argument("--output-dir", default=ARTIFACTS_DIR, help="where versioned artifacts are written")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="only write the versioned artifact, leave the served model untouched")
+    parser.add_argument("--export", action="store_true",
+                        help="only convert the existing pickles into the served artifact format")
+    parser.add_argument("--incremental", action="store_true",
+                        help="grow the latest artifact with new films instead of retraining from scratch")
+    parser.add_argument("--trees-per-update", type=int, default=20, help="trees added by --incremental")
+    parser.add_argument("--drift-threshold", type=float, default=0.25,
+                        help="PSI above which --incremental falls back to a full retrain")
+    parser.add_argument("--min-drift-rows", type=int, default=30, help="new films needed before PSI is checked")
+    parser.add_argument("--max-new-fraction", type=float, default=0.5,
+                        help="share of new films above which a full retrain is run")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.02,
+                        help="held-out accuracy drop that triggers a full retrain")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.export:
+        export_pickles(args)
+    elif args.incremental:
+        train_incremental(args)
     else:
-        return "Average"
-
-df["Success_Category"] = df.apply(classify_success, axis=1)
-print("Success categories assigned.")
-
-# Features and target
-features = ["Runtime", "Meta_score", "Released_Year", "Genre"]
-X = df[features]
-y = df["Success_Category"]
-
-# Encode categorical data (Genre)
-encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-genre_encoded = encoder.fit_transform(X[["Genre"]])
-genre_df = pd.DataFrame(genre_encoded, columns=encoder.get_feature_names_out(["Genre"]))
-X_encoded = pd.concat([X[["Runtime", "Meta_score", "Released_Year"]].reset_index(drop=True), genre_df], axis=1)
-print("Features encoded. Shape of X_encoded:", X_encoded.shape)
-
-# Split and train
-X_train, X_test, y_train, y_test = train_test_split(X_encoded, y, test_size=0.2, random_state=42)
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-print("Model trained.")
-
-# Save model and encoder
-with open("success_predictor_model.pkl", "wb") as f:
-    pickle.dump(model, f)
-with open("genre_encoder.pkl", "wb") as f:
-    pickle.dump(encoder, f)
-print("Model and encoder saved as success_predictor_model.pkl and genre_encoder.pkl")
-
-# Evaluate model
-accuracy = model.score(X_test, y_test)
-print(f"Model Accuracy: {accuracy:.2f}")
-print("Category Distribution in Training Data:")
-print(df["Success_Category"].value_counts())
-print("Script completed successfully!")
\ No newline at end of file
+        train(args)
@@ -0,0 +1,50 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+NUMERIC_FEATURES = ["Runtime", "Meta_score", "Released_Year"]
+INPUT_COLUMNS = NUMERIC_FEATURES + ["Genre"]
+CHUNK_SIZE = 5000
+
+def prepare_inputs(df):
+    # Accepts hand-entered values or IMDB-style exports ("142 min", "Crime, Drama")
+    missing = [col for col in INPUT_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    inputs = pd.DataFrame(index=df.index)
+    for col in NUMERIC_FEATURES:
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(str).str.extract(r"(\d+\.?\d*)", expand=False)
+        inputs[col] = pd.to_numeric(values, errors="coerce")
+    inputs["Genre"] = df["Genre"].astype(str).str.split(",").str[0].str.strip()
+    return inputs
+
+def encode_features(inputs, encoder, feature_names=None):
+    # One vectorized transform for the whole batch instead of a DataFrame concat per film
+    genre_encoded = encoder.transform(inputs[["Genre"]])
+    if hasattr(genre_encoded, "toarray"):
+        genre_encoded = genre_encoded.toarray()
+    matrix = np.hstack([inputs[NUMERIC_FEATURES].to_numpy(dtype=float), genre_encoded])
+    columns = list(feature_names) if feature_names is not None and len(feature_names) else NUMERIC_FEATURES + list(encoder.get_feature_names_out(["Genre"]))
+    return pd.DataFrame(matrix, columns=columns, index=inputs.index)
+
+def score_batch(df, model, encoder, chunk_size=CHUNK_SIZE):
+    # Predicted label plus one probability column per class; rows with unusable
+    # inputs are kept and marked instead of failing the whole batch.
+    inputs = prepare_inputs(df)
+    valid = inputs[NUMERIC_FEATURES].notna().all(axis=1).to_numpy()
+    classes = [str(c) for c in model.classes_]
+    probabilities = np.full((len(inputs), len(classes)), np.nan)
+    if valid.any():
+        features = encode_features(inputs[valid], encoder, getattr(model, "feature_names_in_", None))
+        positions = np.flatnonzero(valid)
+        for start in range(0, len(features), chunk_size):
+            chunk = features.iloc[start:start + chunk_size]
+            probabilities[positions[start:start + chunk_size]] = model.predict_proba(chunk)
+
+    results = df.copy()
+    labels = np.array(classes, dtype=object)[np.nan_to_num(probabilities).argmax(axis=1)]
+    results["Predicted_Success"] = np.where(valid, labels, "Invalid input")
+    for i, label in enumerate(classes):
+        results[f"P({label})"] = probabilities[:, i].round(3)
+    return results
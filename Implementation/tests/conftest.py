@@ -0,0 +1,37 @@
+import os
+import sys
+import pytest #type:ignore
+
+# The app's modules live flat in Implementation/ and are imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubServer  # noqa: E402
+
+@pytest.fixture
+def stub():
+    server = StubServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture(scope="session")
+def small_model():
+    # A small forest and encoder fitted the way predictor.py fits them
+    import numpy as np # type: ignore
+    import pandas as pd # type: ignore
+    from sklearn.ensemble import RandomForestClassifier # type: ignore
+    from sklearn.preprocessing import OneHotEncoder # type: ignore
+    from scoring import NUMERIC_FEATURES, encode_features
+
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame({
+        "Runtime": rng.integers(80, 200, n),
+        "Meta_score": rng.integers(30, 100, n),
+        "Released_Year": rng.integers(1950, 2020, n),
+        "Genre": rng.choice(["Drama", "Action", "Comedy", "Crime"], n)
+    })
+    y = np.where(df["Meta_score"] > 75, "Hit", np.where(df["Runtime"] < 100, "Flop", "Average"))
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore").fit(df[["Genre"]])
+    X = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    return model, encoder, df
@@ -0,0 +1,21 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+# Row-wise duration parsing as GlobalTrend.py did it before dataset.parse_duration,
+# kept as the reference for parity tests and benchmarks
+def parse_duration_apply(durations, minutes_per_season=10 * 60):
+    df = pd.DataFrame({"duration": pd.Series(durations, dtype=object)})
+    df['duration_value'] = df['duration'].str.extract(r'(\d+)').astype(float)
+    df['duration_unit'] = df['duration'].str.extract('([a-zA-Z]+)')
+    def convert_to_minutes(row):
+        if pd.isna(row['duration_value']) or pd.isna(row['duration_unit']):
+            return np.nan
+        unit = row['duration_unit'].strip().lower()
+        if unit == 'min':
+            return row['duration_value']
+        elif unit in ['season', 'seasons']:
+            return row['duration_value'] * minutes_per_season
+        else:
+            return np.nan
+    minutes = df.apply(convert_to_minutes, axis=1).to_numpy(dtype=float)
+    return minutes, minutes / 60
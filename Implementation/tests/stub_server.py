@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class Response:
+    # One scripted answer: status, body (dict -> JSON, bytes as is), extra
+    # headers and a delay before anything is sent
+    def __init__(self, status=200, body=None, headers=None, delay=0):
+        self.status = status
+        self.body = body if body is not None else {}
+        self.headers = headers or {}
+        self.delay = delay
+
+class StubServer:
+    # Local HTTP origin standing in for TMDb (API and images). Each path
+    # answers with its scripted responses in turn, the last one repeating;
+    # unknown paths get a 404. A response may also be a function of the
+    # parsed query string. Every request is recorded in `calls`.
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with stub._lock:
+                    stub.calls.append((url.path, query))
+                    script = stub.routes.get(url.path)
+                    response = script.pop(0) if script and len(script) > 1 else (script or [Response(404)])[0]
+                if callable(response):
+                    response = response(query)
+                time.sleep(response.delay)
+                body = response.body if isinstance(response.body, bytes) else json.dumps(response.body).encode()
+                try:
+                    self.send_response(response.status)
+                    for name, value in response.headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def route(self, path, *responses):
+        with self._lock:
+            self.routes[path] = list(responses)
+
+    def hits(self, path):
+        with self._lock:
+            return sum(1 for called, _ in self.calls if called == path)
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
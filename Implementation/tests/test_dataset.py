@@ -0,0 +1,29 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pytest # type: ignore
+from dataset import MINUTES_PER_SEASON, NETFLIX_FILE, parse_duration
+from legacy import parse_duration_apply
+
+SAMPLES = ["90 min", "1 Season", "3 Seasons", np.nan, "2 Episodes", "", "45 MIN", "min", "7"]
+
+def test_known_values():
+    minutes, hours = parse_duration(["90 min", "1 Season", "3 Seasons"])
+    np.testing.assert_array_equal(minutes, [90, MINUTES_PER_SEASON, 3 * MINUTES_PER_SEASON])
+    np.testing.assert_array_equal(hours, minutes / 60)
+
+def test_missing_and_unknown_units_are_nan():
+    minutes, hours = parse_duration([np.nan, "2 Episodes", "", "min", "7"])
+    assert np.isnan(minutes).all()
+    assert np.isnan(hours).all()
+
+@pytest.mark.parametrize("minutes_per_season", [MINUTES_PER_SEASON, 480, 0])
+def test_matches_row_wise_parser(minutes_per_season):
+    expected = parse_duration_apply(SAMPLES, minutes_per_season)
+    actual = parse_duration(SAMPLES, minutes_per_season)
+    for exp, act in zip(expected, actual):
+        np.testing.assert_array_equal(act, exp)
+
+def test_matches_row_wise_parser_on_netflix_titles():
+    durations = pd.read_csv(NETFLIX_FILE, usecols=["duration"])["duration"]
+    for exp, act in zip(parse_duration_apply(durations), parse_duration(durations)):
+        np.testing.assert_array_equal(act, exp)
@@ -0,0 +1,39 @@
+import hashlib
+import pickle
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from forest import FlatForest
+from model_artifact import load_artifact, write_artifact
+from scoring import NUMERIC_FEATURES, encode_features
+
+def probe_rows(model, df, encoder):
+    # Training rows, random rows and rows sitting exactly on split thresholds
+    X = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder)
+    rng = np.random.default_rng(1)
+    random = X.sample(200, replace=True, random_state=1).to_numpy(dtype=float, copy=True)
+    random[:, :len(NUMERIC_FEATURES)] += rng.normal(0, 10, (200, len(NUMERIC_FEATURES)))
+    edges = X.to_numpy(dtype=float, copy=True)[:50]
+    tree = model.estimators_[0].tree_
+    for i, node in enumerate(np.flatnonzero(tree.children_left != -1)[:50]):
+        edges[i % 50, tree.feature[node]] = tree.threshold[node]
+    return pd.DataFrame(np.vstack([X.to_numpy(dtype=float), random, edges]), columns=X.columns)
+
+def assert_same_predictions(forest, model, X):
+    np.testing.assert_allclose(forest.predict_proba(X.to_numpy()), model.predict_proba(X), rtol=0, atol=1e-12)
+    assert (forest.predict(X.to_numpy()) == model.predict(X)).all()
+
+def test_flat_forest_matches_sklearn(small_model):
+    model, encoder, df = small_model
+    forest = FlatForest.from_model(model)
+    assert list(forest.classes_) == list(model.classes_)
+    assert list(forest.feature_names_in_) == list(model.feature_names_in_)
+    assert_same_predictions(forest, model, probe_rows(model, df, encoder))
+
+def test_served_artifact_matches_sklearn(small_model, tmp_path):
+    model, encoder, df = small_model
+    write_artifact(model, encoder, hashlib.sha256(pickle.dumps(model)).hexdigest(), str(tmp_path))
+    _, forest, served_encoder = load_artifact(str(tmp_path))
+    inputs = pd.concat([df, pd.DataFrame([{"Runtime": 120, "Meta_score": 80, "Released_Year": 2000, "Genre": "Western"}])])
+    X = encode_features(inputs[NUMERIC_FEATURES + ["Genre"]], encoder)
+    np.testing.assert_array_equal(encode_features(inputs[NUMERIC_FEATURES + ["Genre"]], served_encoder), X)
+    assert_same_predictions(forest, model, probe_rows(model, df, encoder))
@@ -0,0 +1,47 @@
+from hydrate import hydrate
+from stub_server import Response
+from tmdb import TMDbClient
+from tmdb_cache import ResponseCache
+from user_store import UserStore
+
+def details(movie_id, runtime):
+    return Response(body={"id": movie_id, "title": f"Film {movie_id}", "poster_path": f"/{movie_id}.jpg",
+                          "vote_average": 7.5, "runtime": runtime, "genres": [{"name": "Drama"}, {"name": "Crime"}],
+                          "release_date": "1995-12-15"})
+
+def make_store(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"), str(tmp_path / "missing.json"))
+    store.create_user("bob", {"password": "x", "full_name": "Bob"})
+    for username in ("admin", "bob"):
+        for movie_id in (1, 2):
+            store.add_movie(username, movie_id, {"title": f"T{movie_id}", "poster": None, "rating": 5.0})
+    return store
+
+def test_hydrate_fetches_each_film_once_and_shares_it(stub, tmp_path):
+    store = make_store(tmp_path)
+    stub.route("/movie/1", details(1, 170))
+    stub.route("/movie/2", Response(404))
+    client = TMDbClient(base_url=stub.url, retries=0, cache=ResponseCache(str(tmp_path / "cache.db")))
+    assert hydrate(store, client, workers=4) == {"candidates": 2, "updated": 1, "failed": 1}
+    assert stub.hits("/movie/1") == 1
+    for username in ("admin", "bob"):
+        entry = store.get_user(username)["movie_checklist"]["1"]
+        assert (entry["title"], entry["poster"], entry["rating"]) == ("Film 1", "/1.jpg", 7.5)
+    assert store.get_movies(["1"])["1"]["runtime"] == 170
+    assert store.get_movies(["1"])["1"]["genres"] == "Drama, Crime"
+    # Only the failed film is still due
+    assert store.movies_to_hydrate(7) == ["2"]
+
+def test_hydrate_bypasses_fresh_cache_entries(stub, tmp_path):
+    store = make_store(tmp_path)
+    client = TMDbClient(base_url=stub.url, retries=0, cache=ResponseCache(str(tmp_path / "cache.db")))
+    stub.route("/movie/1", details(1, 100))
+    stub.route("/movie/2", details(2, 100))
+    assert client.movie_details(1)["runtime"] == 100
+    stub.route("/movie/1", details(1, 120))
+    assert hydrate(store, client, max_age_days=0)["updated"] == 2
+    assert stub.hits("/movie/1") == 2
+    assert store.get_movies(["1"])["1"]["runtime"] == 120
+    # The cache holds the refreshed body too
+    assert client.movie_details(1)["runtime"] == 120
+    assert stub.hits("/movie/1") == 2
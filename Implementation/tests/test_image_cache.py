@@ -0,0 +1,84 @@
+import io
+import os
+import time
+import requests # type: ignore
+from PIL import Image # type: ignore
+import image_cache
+from image_cache import ImageCache
+from stub_server import Response
+
+def jpeg(width=500, height=750, color=(200, 30, 30)):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, "JPEG")
+    return Response(body=out.getvalue(), headers={"Content-Type": "image/jpeg"})
+
+def make_cache(stub, tmp_path, monkeypatch, **kwargs):
+    monkeypatch.setattr(image_cache, "POSTER_BASE_URL", stub.url + "/w500")
+    return ImageCache(requests.Session(), cache_dir=str(tmp_path / "images"),
+                      index_path=str(tmp_path / "index.db"), **kwargs)
+
+def settle(cache, timeout=5):
+    # Waits for background downloads to finish
+    deadline = time.monotonic() + timeout
+    while cache._fetching and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_miss_returns_origin_then_local_thumbnails(stub, tmp_path, monkeypatch):
+    stub.route("/w500/p1.jpg", jpeg())
+    cache = make_cache(stub, tmp_path, monkeypatch)
+    assert cache.poster_path("/p1.jpg", 50) == image_cache.IMAGE_BASE_URL + "/p1.jpg"
+    settle(cache)
+    sizes = {width: Image.open(cache.poster_path("/p1.jpg", width)).size for width in (50, 150, 250)}
+    assert sizes == {50: (100, 150), 150: (300, 450), 250: (500, 750)}
+    assert cache.poster_url("/p1.jpg", 250).startswith(image_cache.STATIC_URL + "/")
+    # One origin request serves every size, on every later lookup
+    assert stub.hits("/w500/p1.jpg") == 1
+
+def test_files_are_named_by_content(stub, tmp_path, monkeypatch):
+    stub.route("/w500/a.jpg", jpeg())
+    stub.route("/w500/b.jpg", jpeg())
+    cache = make_cache(stub, tmp_path, monkeypatch)
+    cache.poster_path("/a.jpg", 50)
+    cache.poster_path("/b.jpg", 50)
+    settle(cache)
+    assert cache.poster_path("/a.jpg", 50) == cache.poster_path("/b.jpg", 50)
+    assert len(os.listdir(cache.cache_dir)) == len(image_cache.POSTER_WIDTHS)
+
+def test_failed_download_is_not_retried_at_once(stub, tmp_path, monkeypatch):
+    stub.route("/w500/missing.jpg", Response(404))
+    cache = make_cache(stub, tmp_path, monkeypatch)
+    for _ in range(3):
+        assert cache.poster_url("/missing.jpg", 50) == image_cache.IMAGE_BASE_URL + "/missing.jpg"
+        settle(cache)
+    assert stub.hits("/w500/missing.jpg") == 1
+
+def test_slow_origin_never_blocks_a_lookup(stub, tmp_path, monkeypatch):
+    stub.route("/w500/slow.jpg", Response(body=b"", delay=1))
+    cache = make_cache(stub, tmp_path, monkeypatch)
+    started = time.monotonic()
+    cache.poster_path("/slow.jpg", 150)
+    assert time.monotonic() - started < 0.5
+
+def test_background_is_cached_at_wallpaper_width(stub, tmp_path, monkeypatch):
+    stub.route("/bg.jpg", jpeg(2400, 1200))
+    cache = make_cache(stub, tmp_path, monkeypatch)
+    url = stub.url + "/bg.jpg"
+    assert cache.background_url(url) == url
+    settle(cache)
+    name = cache.background_url(url).rsplit("/", 1)[1]
+    assert Image.open(os.path.join(cache.cache_dir, name)).size == (image_cache.WALLPAPER_WIDTH, 960)
+
+def test_evicts_least_recently_used_under_budget(stub, tmp_path, monkeypatch):
+    for i in range(8):
+        stub.route(f"/w500/{i}.jpg", jpeg(color=(i * 30, 100, 200 - i * 20)))
+    cache = make_cache(stub, tmp_path, monkeypatch, max_bytes=12_000)
+    for i in range(8):
+        cache.poster_path(f"/{i}.jpg", 50)
+        settle(cache)
+        # Keep the first poster in use so it survives eviction
+        cache.poster_path("/0.jpg", 50)
+    assert cache._size <= cache.max_bytes
+    rows = {row[0] for row in cache._connect().execute("SELECT file FROM images")}
+    assert rows == set(os.listdir(cache.cache_dir))
+    assert cache.poster_path("/0.jpg", 50).startswith(cache.cache_dir)
+    assert not cache.poster_path("/1.jpg", 50).startswith(cache.cache_dir)
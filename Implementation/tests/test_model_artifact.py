@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+import pickle
+import numpy as np # type: ignore
+import pytest # type: ignore
+import sklearn # type: ignore
+from model_artifact import MANIFEST_FILE, ArtifactError, load_artifact, write_artifact
+
+def model_sha(model):
+    return hashlib.sha256(pickle.dumps(model)).hexdigest()
+
+def test_manifest_records_sklearn_version_for_fresh_model(small_model, tmp_path):
+    model, encoder, _ = small_model
+    assert not hasattr(model, "_sklearn_version")
+    manifest = write_artifact(model, encoder, model_sha(model), str(tmp_path))
+    assert manifest["sklearn_version"] == sklearn.__version__
+
+def test_republishing_same_model_keeps_mapped_files(small_model, tmp_path):
+    model, encoder, _ = small_model
+    sha = model_sha(model)
+    manifest = write_artifact(model, encoder, sha, str(tmp_path))
+    _, forest, _ = load_artifact(str(tmp_path))
+    files = [os.path.join(tmp_path, entry["file"]) for entry in manifest["files"].values()]
+    inodes = [os.stat(path).st_ino for path in files]
+    write_artifact(model, encoder, sha, str(tmp_path))
+    assert [os.stat(path).st_ino for path in files] == inodes
+    # The arrays mapped before the second publish are still readable
+    assert np.asarray(forest.value).sum() > 0
+
+def test_changed_array_is_replaced_not_overwritten(small_model, tmp_path):
+    model, encoder, _ = small_model
+    sha = model_sha(model)
+    manifest = write_artifact(model, encoder, sha, str(tmp_path))
+    path = os.path.join(tmp_path, manifest["files"]["threshold"]["file"])
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\x00")
+    with pytest.raises(ArtifactError):
+        load_artifact(str(tmp_path))
+    inode = os.stat(path).st_ino
+    write_artifact(model, encoder, sha, str(tmp_path))
+    assert os.stat(path).st_ino != inode
+    load_artifact(str(tmp_path))
+
+def test_manifest_is_swapped_atomically(small_model, tmp_path):
+    model, encoder, _ = small_model
+    write_artifact(model, encoder, model_sha(model), str(tmp_path))
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+    with open(os.path.join(tmp_path, MANIFEST_FILE)) as f:
+        assert json.load(f)["model_sha256"] == model_sha(model)
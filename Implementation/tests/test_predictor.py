@@ -0,0 +1,128 @@
+import json
+import os
+import pickle
+from datetime import datetime, timedelta
+import pandas as pd # type: ignore
+import pytest # type: ignore
+import predictor
+from dataset import IMDB_FILE
+from forest import FlatForest
+from model_artifact import MANIFEST_FILE, expected_feature_names
+from model_registry import ENCODER_FILE, MODEL_FILE
+from predictor import fingerprint_rows, load_training_data
+from scoring import NUMERIC_FEATURES, encode_features
+
+def test_fingerprints_are_unique_per_film():
+    df = load_training_data()
+    assert len(set(fingerprint_rows(df))) == len(df)
+
+def test_film_with_same_features_as_another_is_new():
+    df = load_training_data()
+    twin = df.iloc[[0]].assign(Series_Title="A Different Film")
+    assert fingerprint_rows(twin)[0] not in set(fingerprint_rows(df))
+    # The same film again is not
+    assert fingerprint_rows(df.iloc[[0]])[0] in set(fingerprint_rows(df))
+
+class MispredictingForest:
+    # Stands in for a flattened forest that disagrees with sklearn
+    def __init__(self, model):
+        self.classes_ = model.classes_
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model)
+
+    def predict(self, X):
+        return self.classes_[[0] * len(X)]
+
+def test_publish_leaves_served_artifact_alone_when_parity_fails(small_model, tmp_path, monkeypatch):
+    model, encoder, df = small_model
+    X = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder, model.feature_names_in_)
+    monkeypatch.setattr(predictor, "ARTIFACT_DIR", str(tmp_path))
+    predictor.publish(model, encoder, X, "a" * 64)
+    manifest_path = os.path.join(tmp_path, MANIFEST_FILE)
+    with open(manifest_path) as f:
+        served = json.load(f)
+
+    monkeypatch.setattr(predictor, "FlatForest", MispredictingForest)
+    with pytest.raises(SystemExit):
+        predictor.publish(model, encoder, X, "b" * 64)
+    with open(manifest_path) as f:
+        assert json.load(f) == served
+    assert sorted(entry.name for entry in os.scandir(tmp_path) if entry.is_dir()) == ["aaaaaaaaaaaa"]
+
+class Clock:
+    # Versions are named by the second; give every artifact its own
+    ticks = 0
+
+    @classmethod
+    def now(cls):
+        cls.ticks += 1
+        return datetime(2026, 1, 1) + timedelta(seconds=cls.ticks)
+
+@pytest.fixture
+def imdb_rows():
+    # Raw CSV rows in the IMDB file's own format
+    return pd.read_csv(IMDB_FILE)
+
+def incremental_args(tmp_path, rows, *extra):
+    path = str(tmp_path / f"imdb_{len(rows)}.csv")
+    rows.to_csv(path, index=False)
+    return predictor.parse_args(["--data", path, "--search", "none", "--cv", "2", "--n-jobs", "1",
+                                 "--output-dir", str(tmp_path / "artifacts"), "--no-publish", *extra])
+
+def load_version(output_dir):
+    version_dir = predictor.latest_artifact(output_dir)
+    with open(os.path.join(version_dir, MODEL_FILE), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(version_dir, ENCODER_FILE), "rb") as f:
+        encoder = pickle.load(f)
+    with open(os.path.join(version_dir, "metrics.json")) as f:
+        metrics = json.load(f)
+    return model, encoder, metrics
+
+def test_incremental_update_adds_unseen_genre(tmp_path, monkeypatch, imdb_rows):
+    monkeypatch.setattr(predictor, "datetime", Clock)
+    base = imdb_rows.iloc[:300]
+    args = incremental_args(tmp_path, base, "--max-accuracy-drop", "1")
+    predictor.train(args)
+    new = imdb_rows.iloc[300:320].assign(Genre="Noir, Drama")
+    args = incremental_args(tmp_path, pd.concat([base, new]), "--max-accuracy-drop", "1")
+    result = predictor.train_incremental(args)
+    assert result["mode"] == "incremental"
+    assert result["unseen_genres"] == ["Noir"]
+
+    model, encoder, metrics = load_version(args.output_dir)
+    genres = [str(genre) for genre in encoder.categories_[0]]
+    assert genres[-1] == "Noir"
+    assert metrics["feature_names"] == expected_feature_names(genres) == list(model.feature_names_in_)
+    assert {estimator.n_features_in_ for estimator in model.estimators_} == {len(genres) + len(NUMERIC_FEATURES)}
+    assert len(model.estimators_) == 100 + args.trees_per_update
+
+    df = predictor.load_training_data(args.data)
+    X = encode_features(df[NUMERIC_FEATURES + ["Genre"]], encoder)
+    assert (X.loc[df["Genre"] == "Noir", "Genre_Noir"] == 1).all()
+    assert (FlatForest.from_model(model).predict(X.to_numpy()) == model.predict(X)).all()
+
+def test_feature_drift_falls_back_to_full_retrain(tmp_path, monkeypatch, imdb_rows, capsys):
+    monkeypatch.setattr(predictor, "datetime", Clock)
+    base = imdb_rows.iloc[:300]
+    predictor.train(incremental_args(tmp_path, base))
+    # Films from a decade the reference never saw
+    new = imdb_rows.iloc[300:340].assign(Released_Year=2090)
+    result = predictor.train_incremental(incremental_args(tmp_path, pd.concat([base, new]), "--max-accuracy-drop", "1"))
+    assert result["mode"] == "full"
+    assert "feature drift" in capsys.readouterr().out
+
+def test_accuracy_drop_falls_back_to_full_retrain(tmp_path, monkeypatch, imdb_rows, capsys):
+    monkeypatch.setattr(predictor, "datetime", Clock)
+    base = imdb_rows.iloc[:300]
+    predictor.train(incremental_args(tmp_path, base))
+    new = imdb_rows.iloc[300:320]
+    # A negative tolerance means even an unchanged accuracy counts as a drop
+    result = predictor.train_incremental(incremental_args(tmp_path, pd.concat([base, new]), "--max-accuracy-drop", "-1"))
+    assert result["mode"] == "full"
+    assert "held-out accuracy dropped" in capsys.readouterr().out
+    # The full retrain is now the latest version, with only its own trees
+    model, _, metrics = load_version(str(tmp_path / "artifacts"))
+    assert metrics["mode"] == "full" and len(model.estimators_) == 100
@@ -0,0 +1,30 @@
+from title_index import TitleIndex, normalize
+
+TITLES = ["The Godfather", "The Godfather: Part II", "The Dark Knight", "Amélie", "Heat", "Goodfellas"]
+
+def test_normalize():
+    assert normalize("Amélie (2001)") == "amelie 2001"
+    assert normalize("  The  Dark-Knight ") == "the dark knight"
+
+def test_contains_ignores_case_and_accents():
+    index = TitleIndex(TITLES)
+    assert "the godfather" in index
+    assert "AMELIE" in index
+    assert "the god" not in index
+
+def test_prefix_matches_any_word_start():
+    index = TitleIndex(TITLES)
+    assert index.prefix_matches("the god", 5) == ["The Godfather", "The Godfather: Part II"]
+    assert index.prefix_matches("knight", 5) == ["The Dark Knight"]
+    assert index.prefix_matches("zzz", 5) == []
+
+def test_suggest_falls_back_to_similar_titles():
+    index = TitleIndex(TITLES)
+    assert index.suggest("goodfelas") == ["Goodfellas"]
+    assert "Heat" not in index.suggest("heat")
+
+def test_added_titles_are_searchable_and_deduplicated():
+    index = TitleIndex(TITLES)
+    index.add(["Heat", "HEAT", "Heathers"])
+    assert len(index) == len(TITLES) + 1
+    assert index.prefix_matches("heat", 5) == ["Heat", "Heathers"]
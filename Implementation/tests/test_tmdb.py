@@ -0,0 +1,89 @@
+import time
+import tmdb
+import tmdb_cache
+from stub_server import Response
+from tmdb import TMDbClient
+from tmdb_cache import ResponseCache
+
+PAGE = {"results": [{"id": 1, "title": "Heat"}]}
+
+def make_client(stub, **kwargs):
+    kwargs.setdefault("timeout", (1, 1))
+    return TMDbClient(api_key="test", base_url=stub.url, **kwargs)
+
+def test_get_returns_json_and_sends_api_key(stub):
+    stub.route("/movie/popular", Response(body=PAGE))
+    assert make_client(stub).get("/movie/popular", page=1) == PAGE
+    assert stub.calls[0][1]["api_key"] == ["test"]
+
+def test_server_errors_are_retried(stub):
+    stub.route("/movie/popular", Response(503), Response(502), Response(body=PAGE))
+    assert make_client(stub).popular_movies() == PAGE["results"]
+    assert stub.hits("/movie/popular") == 3
+
+def test_gives_up_after_max_retries(stub):
+    stub.route("/movie/popular", Response(503))
+    assert make_client(stub, retries=2).get("/movie/popular") is None
+    assert stub.hits("/movie/popular") == 3
+
+def test_client_errors_are_not_retried(stub):
+    stub.route("/movie/1", Response(404))
+    assert make_client(stub).movie_details(1) == {}
+    assert stub.hits("/movie/1") == 1
+
+def test_429_honours_retry_after(stub):
+    stub.route("/movie/popular", Response(429, headers={"Retry-After": "1"}), Response(body=PAGE))
+    started = time.monotonic()
+    assert make_client(stub).popular_movies() == PAGE["results"]
+    assert time.monotonic() - started >= 1
+    assert stub.hits("/movie/popular") == 2
+
+def test_retry_after_is_capped(stub, monkeypatch):
+    monkeypatch.setattr(tmdb, "MAX_RETRY_AFTER", 0.2)
+    stub.route("/movie/popular", Response(429, headers={"Retry-After": "120"}), Response(body=PAGE))
+    started = time.monotonic()
+    assert make_client(stub).popular_movies() == PAGE["results"]
+    assert time.monotonic() - started < 5
+
+def test_read_timeout_is_retried_once(stub):
+    stub.route("/movie/popular", Response(body=PAGE, delay=1.5))
+    started = time.monotonic()
+    assert make_client(stub, timeout=(1, 0.3)).get("/movie/popular") is None
+    # Two read timeouts, not one per configured retry
+    assert time.monotonic() - started < 1.5
+    assert stub.hits("/movie/popular") == 2
+
+def test_connection_refused_returns_none():
+    client = TMDbClient(base_url="http://127.0.0.1:9", timeout=(0.2, 0.2), retries=0)
+    assert client.get("/movie/popular") is None
+
+def test_failed_request_falls_back_to_cache(stub, tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    client = make_client(stub, retries=0, cache=cache)
+    stub.route("/movie/1", Response(body={"id": 1, "title": "Heat"}))
+    assert client.movie_details(1)["title"] == "Heat"
+    # Expire the entry and take the origin down: the stored body is still served
+    monkeypatch.setitem(tmdb_cache.TTLS, "details", (0, 0))
+    stub.route("/movie/1", Response(503))
+    assert client.movie_details(1)["title"] == "Heat"
+    assert stub.hits("/movie/1") == 2
+
+def popular_page(query):
+    page = int(query["page"][0])
+    return Response(body={"results": [{"id": page * 100 + i, "title": f"P{page}-{i}"} for i in range(20)]})
+
+def test_popular_feed_recovers_after_outage(stub):
+    # A failed page is retried on the next call instead of ending the feed
+    stub.route("/movie/popular", Response(503))
+    feed = tmdb.PopularFeed(make_client(stub, retries=0), batch_pages=2)
+    assert feed.available([], 30) == []
+    assert not feed.exhausted
+    stub.route("/movie/popular", popular_page)
+    movies = feed.available([], 30)
+    assert [movie["id"] // 100 for movie in movies] == [1] * 20 + [2] * 10
+
+def test_popular_feed_stops_at_empty_page(stub):
+    stub.route("/movie/popular", Response(body={"results": [{"id": 1, "title": "Heat"}]}), Response(body={"results": []}))
+    feed = tmdb.PopularFeed(make_client(stub, retries=0), batch_pages=1)
+    assert [movie["id"] for movie in feed.available([], 10)] == [1]
+    assert feed.exhausted
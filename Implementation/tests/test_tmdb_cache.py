@@ -0,0 +1,103 @@
+import threading
+import time
+from stub_server import Response
+from tmdb import TMDbClient
+from tmdb_cache import DAY, EXPIRED, FRESH, STALE, TTLS, ResponseCache, cache_key
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "cache.db"), **kwargs)
+
+def age(cache, key, seconds):
+    # Pretends the entry was fetched `seconds` ago
+    with cache._connect() as conn:
+        conn.execute("UPDATE responses SET fetched = ? WHERE key = ?", (time.time() - seconds, key))
+
+def test_cache_key_ignores_api_key_and_parameter_order():
+    assert cache_key("/search/movie", {"query": "heat", "page": 1, "api_key": "a"}) == \
+        cache_key("/search/movie", {"page": 1, "query": "heat", "api_key": "b"})
+
+def test_entries_are_fresh_then_stale_then_expired(tmp_path):
+    cache = make_cache(tmp_path)
+    fresh_for, stale_for = TTLS["popular"]
+    assert cache.get("k", "popular") == (None, EXPIRED)
+    cache.put("k", "popular", {"results": [1]})
+    assert cache.get("k", "popular") == ({"results": [1]}, FRESH)
+    age(cache, "k", fresh_for + 1)
+    assert cache.get("k", "popular") == ({"results": [1]}, STALE)
+    assert cache.peek("k", "popular") == {"results": [1]}
+    age(cache, "k", fresh_for + stale_for + 1)
+    assert cache.get("k", "popular") == ({"results": [1]}, EXPIRED)
+    assert cache.peek("k", "popular") is None
+
+def test_ttls_differ_per_endpoint(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("p", "popular", {})
+    cache.put("d", "details", {})
+    age(cache, "p", DAY)
+    age(cache, "d", DAY)
+    assert cache.get("p", "popular")[1] == STALE
+    assert cache.get("d", "details")[1] == FRESH
+
+def test_counters_and_hit_rate(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.get("k", "search")
+    cache.put("k", "search", {"results": []})
+    cache.get("k", "search")
+    cache.get("k", "search")
+    age(cache, "k", TTLS["search"][0] + 1)
+    cache.get("k", "search")
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["stores"]) == (2, 1, 1, 1)
+    assert stats["hit_rate"] == 0.75
+    assert stats["bytes"] == len('{"results":[]}')
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    body = {"results": ["x" * 90]}
+    size = len('{"results":["' + "x" * 90 + '"]}')
+    cache = make_cache(tmp_path, max_bytes=5 * size)
+    for i in range(5):
+        cache.put(f"k{i}", "details", body)
+    cache.get("k0", "details")  # k0 is now the most recently used
+    cache.put("k5", "details", body)
+    # Over budget: trimmed to 90% of it, oldest access first
+    kept = {key for (key,) in cache._connect().execute("SELECT key FROM responses")}
+    assert kept == {"k0", "k3", "k4", "k5"}
+    assert cache.stats()["bytes"] == 4 * size <= cache.max_bytes * 0.9
+    assert cache.stats()["evictions"] == 2
+    # The size survives a reopen
+    assert make_cache(tmp_path, max_bytes=5 * size).stats()["bytes"] == 4 * size
+
+def test_stale_entry_is_served_while_one_refresh_runs(stub, tmp_path):
+    cache = make_cache(tmp_path)
+    client = TMDbClient(api_key="test", base_url=stub.url, retries=0, cache=cache)
+    stub.route("/movie/popular", Response(body={"results": [{"id": 1}]}))
+    assert client.popular_movies() == [{"id": 1}]
+    key = cache_key("/movie/popular", {"language": "en-US", "page": 1})
+    age(cache, key, TTLS["popular"][0] + 1)
+    stub.route("/movie/popular", Response(body={"results": [{"id": 2}]}, delay=0.5))
+
+    results = []
+    started = time.monotonic()
+    readers = [threading.Thread(target=lambda: results.append(client.popular_movies())) for _ in range(8)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    # Every caller got the stale page at once, and only one refresh went out
+    assert results == [[{"id": 1}]] * 8
+    assert time.monotonic() - started < 0.5
+    deadline = time.monotonic() + 5
+    while client._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stub.hits("/movie/popular") == 2
+    assert client.popular_movies() == [{"id": 2}]
+    assert stub.hits("/movie/popular") == 2
+
+def test_expired_entry_is_fetched_before_returning(stub, tmp_path):
+    cache = make_cache(tmp_path)
+    client = TMDbClient(api_key="test", base_url=stub.url, retries=0, cache=cache)
+    stub.route("/movie/7", Response(body={"id": 7, "runtime": 90}), Response(body={"id": 7, "runtime": 95}))
+    assert client.movie_details(7)["runtime"] == 90
+    age(cache, cache_key("/movie/7", {"language": "en-US"}), sum(TTLS["details"]) + 1)
+    assert client.movie_details(7)["runtime"] == 95
+    assert stub.hits("/movie/7") == 2
@@ -0,0 +1,236 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+import pytest # type: ignore
+import auth
+import user_store
+from user_store import UserStore
+
+LEGACY_USERS = {
+    "alice": {
+        "password": "pw",
+        "full_name": "Alice A",
+        "dob": "1990-01-01",
+        "email": "alice@example.com",
+        "avatar_path": "avatars/alice.png",
+        "movie_checklist": {
+            "238": {"title": "The Godfather", "watched": True, "poster": "/g.jpg", "rating": 8.7,
+                    "watched_date": "Apr 13, 2025", "user_rating": 5},
+            "155": {"title": "The Dark Knight", "watched": False, "poster": "/d.jpg", "rating": 8.5,
+                    "watched_date": None, "user_rating": None}
+        },
+        "notifications": [{"message": "seen", "read": True}, {"message": "new", "read": False}]
+    },
+    # Older records lack fields that load_credentials used to backfill
+    "bob": {"password": "pw2"}
+}
+
+def make_store(tmp_path, legacy="missing.json"):
+    return UserStore(str(tmp_path / "users.db"), str(tmp_path / legacy))
+
+def legacy_store(tmp_path):
+    (tmp_path / "users.json").write_text(json.dumps(LEGACY_USERS))
+    return make_store(tmp_path, "users.json")
+
+@pytest.fixture
+def auth_store(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(auth, "_store", store)
+    return store
+
+def test_users_json_is_imported_once(tmp_path):
+    store = legacy_store(tmp_path)
+    alice = store.get_user("alice")
+    expected = dict(LEGACY_USERS["alice"], unread=1)
+    assert alice == expected
+    assert list(alice["movie_checklist"]) == ["238", "155"]
+    assert store.get_user("bob") == {"password": "pw2", "full_name": None, "dob": None, "email": None,
+                                     "avatar_path": None, "movie_checklist": {}, "notifications": [], "unread": 0}
+    assert "admin" not in store.usernames()
+    # Later edits to users.json are not imported again
+    (tmp_path / "users.json").write_text(json.dumps({"mallory": {"password": "x"}}))
+    assert make_store(tmp_path, "users.json").usernames() == ["alice", "bob"]
+
+def test_default_admin_is_seeded_without_users_json(tmp_path):
+    assert make_store(tmp_path).usernames() == ["admin"]
+
+def test_register_login_and_update_through_auth(auth_store):
+    assert auth.register_user("carol", "secret", "Carol C", "carol@example.com")
+    assert not auth.register_user("carol", "other", "Impostor", "x@example.com")
+    assert auth.check_login("carol", "secret")
+    assert not auth.check_login("carol", "other")
+    assert not auth.check_login("nobody", "secret")
+    assert auth.update_user_profile("carol", full_name="Carol D", dob="2000-02-02", password="new")
+    carol = auth.get_user("carol")
+    assert (carol["full_name"], carol["dob"], carol["email"]) == ("Carol D", "2000-02-02", "carol@example.com")
+    assert auth.check_login("carol", "new")
+    # An empty password leaves the old one
+    assert auth.update_user_profile("carol", password="")
+    assert auth.check_login("carol", "new")
+    assert not auth.update_user_profile("nobody", full_name="X")
+    assert sorted(auth.list_usernames()) == ["admin", "carol"]
+    with pytest.raises(ValueError):
+        auth_store.update_user("carol", nickname="cc")
+
+def test_failed_transaction_rolls_back(tmp_path):
+    store = legacy_store(tmp_path)
+    before = store.all_users()
+    users = store.all_users()
+    users["alice"]["full_name"] = "Changed"
+    users["zed"] = {"password": None}  # violates NOT NULL after alice is written
+    with pytest.raises(sqlite3.IntegrityError):
+        store.replace_all(users)
+    assert store.all_users() == before
+    assert make_store(tmp_path, "users.json").all_users() == before
+
+def test_snapshot_reloads_after_another_instance_writes(tmp_path):
+    first, second = make_store(tmp_path), make_store(tmp_path)
+    assert second.usernames() == ["admin"]
+    first.create_user("dave", {"password": "pw"})
+    first.add_movie("admin", 1, {"title": "Heat"})
+    assert second.usernames() == ["admin", "dave"]
+    assert second.check_password("dave", "pw")
+    assert list(second.get_user("admin")["movie_checklist"]) == ["1"]
+    first.compact()
+    second.remove_movie("admin", 1)
+    assert first.get_user("admin")["movie_checklist"] == {}
+
+def test_checklist_operations(tmp_path):
+    store = make_store(tmp_path)
+    assert not store.add_movie("nobody", 1, {"title": "Heat"})
+    for movie_id, title in [(1, "Heat"), (2, "Ronin"), (3, "Collateral")]:
+        assert store.add_movie("admin", movie_id, {"title": title, "poster": f"/{movie_id}.jpg", "rating": 7.0})
+    assert store.mark_watched("admin", 2, "Jan 01, 2025")
+    assert store.set_rating("admin", "2", 4)
+    assert not store.mark_watched("admin", 9, "Jan 01, 2025")
+    assert store.remove_movie("admin", 3)
+    assert not store.remove_movie("admin", 3)
+    # Adding an existing film again updates it in place
+    assert store.add_movie("admin", 1, {"title": "Heat (1995)", "rating": 8.3})
+    for checklist in (store.get_user("admin")["movie_checklist"], make_store(tmp_path).get_user("admin")["movie_checklist"]):
+        assert list(checklist) == ["1", "2"]
+        assert checklist["1"] == {"title": "Heat (1995)", "watched": False, "poster": None, "rating": 8.3,
+                                  "watched_date": None, "user_rating": None}
+        assert checklist["2"] == {"title": "Ronin", "watched": True, "poster": "/2.jpg", "rating": 7.0,
+                                  "watched_date": "Jan 01, 2025", "user_rating": 4}
+
+def test_push_notifications_dedupes_and_skips_unknown_recipients(tmp_path):
+    store = make_store(tmp_path)
+    store.create_user("bob", {"password": "x"})
+    assert store.push_notifications(["bob", "ghost", "bob", "admin"], "hi") == ["bob", "admin"]
+    assert store.unread_count("bob") == 1
+    assert [n["message"] for n in store.get_user("bob")["notifications"]] == ["hi"]
+    assert not store.push_notification("ghost", "hi")
+
+def test_push_notifications_is_all_or_nothing(tmp_path):
+    store = make_store(tmp_path)
+    store.create_user("bob", {"password": "x"})
+    with store._transaction() as conn:
+        conn.execute("CREATE TRIGGER reject BEFORE INSERT ON notifications WHEN NEW.username = 'admin' "
+                     "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+    with pytest.raises(sqlite3.IntegrityError):
+        store.push_notifications(["bob", "admin"], "hi")
+    for reader in (store, make_store(tmp_path)):
+        assert reader.unread_count("bob") == 0
+        assert reader.inbox("bob") == []
+
+def test_mark_all_read_moves_the_watermark(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(3):
+        store.push_notification("admin", f"m{i}")
+    store.mark_all_read("admin")
+    assert store.unread_count("admin") == 0
+    store.push_notification("admin", "m3")
+    assert store.unread_count("admin") == 1
+    assert [(n["message"], n["read"]) for n in store.inbox("admin")] == \
+        [("m3", False), ("m2", True), ("m1", True), ("m0", True)]
+    assert make_store(tmp_path).unread_count("admin") == 1
+
+def test_inbox_pages_with_before(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(25):
+        store.push_notification("admin", f"m{i}")
+    pages, before = [], None
+    while True:
+        page = store.inbox("admin", limit=10, before=before)
+        if not page:
+            break
+        pages.append([n["message"] for n in page])
+        before = page[-1]["id"]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [f"m{i}" for i in reversed(range(25))]
+
+def age_notifications(store, days):
+    with store._transaction() as conn:
+        conn.execute("UPDATE notifications SET created = ?", (time.time() - days * 86400,))
+
+def test_expired_notifications_are_pruned_when_the_store_opens(tmp_path):
+    store = make_store(tmp_path)
+    store.push_notification("admin", "old")
+    age_notifications(store, user_store.NOTIFICATION_TTL_DAYS + 1)
+    store.push_notification("admin", "new")
+    assert store.unread_count("admin") == 2
+
+    reopened = make_store(tmp_path)
+    assert [n["message"] for n in reopened.inbox("admin")] == ["new"]
+    assert reopened.unread_count("admin") == 1
+
+def test_expired_notifications_are_pruned_on_an_interval(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.push_notification("admin", "old")
+    age_notifications(store, user_store.NOTIFICATION_TTL_DAYS + 1)
+    store.push_notification("admin", "new")
+    # Within the interval a write does not prune
+    assert len(store.inbox("admin")) == 2
+    monkeypatch.setattr(store, "_pruned", time.time() - user_store.PRUNE_INTERVAL)
+    store.push_notification("admin", "newer")
+    assert [n["message"] for n in store.inbox("admin")] == ["newer", "new"]
+    assert store.unread_count("admin") == 2
+
+def test_read_notifications_pruned_without_touching_the_counter(tmp_path):
+    store = make_store(tmp_path)
+    store.push_notification("admin", "old")
+    store.mark_all_read("admin")
+    age_notifications(store, user_store.NOTIFICATION_TTL_DAYS + 1)
+    store.push_notification("admin", "new")
+    assert store.prune_notifications() == 1
+    assert store.unread_count("admin") == 1
+
+def test_readers_copy_the_snapshot_while_another_session_writes(tmp_path):
+    store = make_store(tmp_path)
+    store.create_user("bob", {"password": "x"})
+    # A long checklist makes each copy slow enough for writes to land mid-copy
+    store.update_user("bob", movie_checklist={f"b{i}": {"title": f"B{i}"} for i in range(3000)})
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                store.all_users()
+                store.get_user("bob", notifications=False)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    try:
+        for i in range(300):
+            for username in ("admin", "bob"):
+                store.add_movie(username, i, {"title": f"T{i}", "rating": 5.0})
+            if i % 3 == 0:
+                store.remove_movie("admin", i - 3)
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
+    expected = {str(i) for i in range(300) if i % 3 or i >= 297}
+    assert set(store.get_user("admin")["movie_checklist"]) == expected
@@ -0,0 +1,135 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+import numpy as np # type: ignore
+from dataset import IMDB_FILE, NETFLIX_FILE, load_imdb, load_netflix
+
+# Prefix candidates gathered before ranking, and the trigram similarity (Dice)
+# below which a title is not offered as a suggestion
+MAX_CANDIDATES = 50
+MIN_SIMILARITY = 0.5
+
+def normalize(title):
+    # "Amélie (2001)" -> "amelie 2001"
+    title = unicodedata.normalize("NFKD", str(title))
+    title = "".join(ch for ch in title if not unicodedata.combining(ch)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", title).split())
+
+def _trigrams(text):
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TitleIndex:
+    # In-memory typeahead over movie titles. Every word start of a normalized
+    # title is a key in one sorted list, so a prefix lookup is a binary search;
+    # queries with too few prefix hits fall back to trigram similarity, scored
+    # with one bincount over the query's posting lists.
+    def __init__(self, titles=()):
+        self.titles = []
+        self._norms = []
+        self._positions = {}
+        self._keys = []
+        self._postings = {}
+        self._gram_counts = []
+        self._arrays = None
+        self._lock = threading.Lock()
+        self.add(titles)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __contains__(self, title):
+        return normalize(title) in self._positions
+
+    def add(self, titles):
+        # Titles already present (after normalization) are skipped
+        with self._lock:
+            keys = []
+            for title in titles:
+                norm = normalize(title)
+                if not norm or norm in self._positions:
+                    continue
+                pos = len(self.titles)
+                self.titles.append(str(title))
+                self._norms.append(norm)
+                self._positions[norm] = pos
+                start = 0
+                for word in norm.split(" "):
+                    keys.append((norm[start:], pos))
+                    start += len(word) + 1
+                grams = _trigrams(norm)
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(pos)
+                self._gram_counts.append(len(grams))
+            if keys:
+                self._keys = list(heapq.merge(self._keys, sorted(keys)))
+                self._arrays = None
+
+    def _posting_arrays(self):
+        arrays = self._arrays
+        if arrays is None:
+            with self._lock:
+                arrays = ({gram: np.array(ids, dtype=np.int32) for gram, ids in self._postings.items()},
+                          np.array(self._gram_counts, dtype=np.int32))
+                self._arrays = arrays
+        return arrays
+
+    def prefix_matches(self, query, limit):
+        # Titles with a word starting with the query; whole-title prefixes and
+        # shorter titles rank first
+        query = normalize(query)
+        if not query:
+            return []
+        keys = self._keys
+        found = {}
+        i = bisect_left(keys, (query,))
+        while i < len(keys) and keys[i][0].startswith(query) and len(found) < MAX_CANDIDATES:
+            key, pos = keys[i]
+            found[pos] = min(found.get(pos, 1), 0 if key == self._norms[pos] else 1)
+            i += 1
+        ranked = sorted(found, key=lambda pos: (found[pos], len(self.titles[pos]), self.titles[pos]))
+        return [self.titles[pos] for pos in ranked[:limit]]
+
+    def similar(self, query, limit):
+        # Typo-tolerant matches by trigram overlap
+        grams = _trigrams(normalize(query))
+        postings, gram_counts = self._posting_arrays()
+        lists = [postings[gram] for gram in grams if gram in postings]
+        if not lists:
+            return []
+        overlap = np.bincount(np.concatenate(lists), minlength=len(gram_counts))
+        score = 2 * overlap / (len(grams) + gram_counts)
+        best = np.argsort(-score, kind="stable")[:limit]
+        return [self.titles[pos] for pos in best if score[pos] >= MIN_SIMILARITY]
+
+    def suggest(self, query, limit=3):
+        # Prefix matches first, then similar titles; never the query itself
+        norm = normalize(query)
+        candidates = self.prefix_matches(query, limit + 1)
+        if len(candidates) <= limit:
+            candidates += self.similar(query, limit + 1)
+        suggestions = []
+        for title in candidates:
+            if normalize(title) != norm and title not in suggestions:
+                suggestions.append(title)
+        return suggestions[:limit]
+
+# Built once per process from the two datasets and the TMDb titles already
+# cached on disk; titles seen later are added as they arrive
+_index = None
+_index_lock = threading.Lock()
+
+def title_index(imdb_path=IMDB_FILE, netflix_path=NETFLIX_FILE, cache=None):
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                netflix = load_netflix(netflix_path)
+                index = TitleIndex(load_imdb(imdb_path)["Series_Title"])
+                index.add(netflix.loc[netflix["type"] == "Movie", "title"])
+                if cache is not None:
+                    index.add(cache.titles())
+                _index = index
+    return _index
@@ -0,0 +1,221 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests #type:ignore
+from requests.adapters import HTTPAdapter #type:ignore
+from urllib3.util.retry import Retry #type:ignore
+from tmdb_cache import FRESH, STALE, ResponseCache, cache_key
+
+API_KEY = os.environ.get("TMDB_API_KEY", "e206cf8b0ba47f28233d0a28ff83c414")
+# Point TMDB_BASE_URL at a local stub server to run the app offline
+BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+# TMDB_IMAGE_BASE_URL does the same for posters (image_cache.py fetches larger sizes from it)
+IMAGE_ORIGIN = os.environ.get("TMDB_IMAGE_BASE_URL", "https://image.tmdb.org/t/p").rstrip("/")
+IMAGE_BASE_URL = f"{IMAGE_ORIGIN}/w200"
+
+POOL_SIZE = 10
+# Popular pages fetched concurrently per batch, and the last page TMDb serves
+PREFETCH_PAGES = 3
+MAX_POPULAR_PAGE = 500
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Longest Retry-After (seconds) honoured on a 429 before giving up on the request
+MAX_RETRY_AFTER = 10
+
+class _Retry(Retry):
+    # Caps the server's Retry-After so a 429 cannot stall a page for minutes
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+class TMDbClient:
+    # One keep-alive session per process instead of a new connection (and TLS
+    # handshake) per call. Failed calls return the same empty results the page
+    # used to get on a non-200, after retries with exponential backoff for
+    # connection errors, 5xx and 429 (honouring Retry-After).
+    # With a ResponseCache, fresh entries are served without a request, stale
+    # ones are served while a background refresh runs, and a failed request
+    # falls back to whatever is stored.
+    def __init__(self, api_key=API_KEY, base_url=BASE_URL, pool_size=POOL_SIZE,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=MAX_RETRIES, cache=None):
+        self.api_key = api_key
+        self.cache = cache
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tmdb-refresh")
+        # Page prefetches; sized to the connection pool so they never queue on it
+        self._prefetcher = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="tmdb-prefetch")
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        retry = _Retry(
+            total=retries,
+            connect=retries,
+            # A read timeout is retried once only, so a stalled response costs
+            # at most two READ_TIMEOUTs
+            read=min(retries, 1),
+            status=retries,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path, **params):
+        # Decoded JSON body, or None when the request failed after retries
+        params = dict(params, api_key=self.api_key)
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def _fetch(self, endpoint, key, path, params):
+        data = self.get(path, **params)
+        if data is not None and self.cache is not None:
+            self.cache.put(key, endpoint, data)
+        return data
+
+    def _refresh(self, endpoint, key, path, params):
+        try:
+            self._fetch(endpoint, key, path, params)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def cached_get(self, endpoint, path, force=False, **params):
+        # force skips the lookup and always asks TMDb, storing what comes back
+        if self.cache is None:
+            return self.get(path, **params)
+        key = cache_key(path, params)
+        if force:
+            return self._fetch(endpoint, key, path, params)
+        data, state = self.cache.get(key, endpoint)
+        if state == FRESH:
+            return data
+        if state == STALE:
+            # One refresh per key at a time, however many sessions ask
+            with self._refresh_lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                self._refresher.submit(self._refresh, endpoint, key, path, params)
+            return data
+        fetched = self._fetch(endpoint, key, path, params)
+        return fetched if fetched is not None else data
+
+    def popular_movies(self, page=1):
+        # The page's results ([] past the last page), or None when the request failed
+        data = self.cached_get("popular", "/movie/popular", language="en-US", page=page)
+        return data.get("results", []) if data is not None else None
+
+    def prefetch_popular(self, pages):
+        # Futures for several popular pages, fetched concurrently; each resolves
+        # as popular_movies does
+        return {page: self._prefetcher.submit(self.popular_movies, page) for page in pages}
+
+    def search_movies(self, query, page=1):
+        # TMDb search ignores case and extra spaces; so does the cache key
+        query = " ".join(query.split()).lower()
+        data = self.cached_get("search", "/search/movie", query=query, page=page)
+        return data.get("results", []) if data else []
+
+    def cached_search(self, query, page=1):
+        # Results of an earlier identical search, or None; never makes a request
+        if self.cache is None:
+            return None
+        query = " ".join(query.split()).lower()
+        data = self.cache.peek(cache_key("/search/movie", {"query": query, "page": page}), "search")
+        return data.get("results", []) if data is not None else None
+
+    def movie_details(self, movie_id, force=False):
+        return self.cached_get("details", f"/movie/{movie_id}", force=force, language="en-US") or {}
+
+class PopularFeed:
+    # Per-session list of popular movies, unique by id. Pages are fetched a
+    # batch at a time in parallel, and once a batch is consumed the next one is
+    # requested in the background, so the following rerun finds it ready.
+    # Pages whose request failed are asked for again with the next batch, on
+    # the following call rather than in the background.
+    def __init__(self, client, batch_pages=PREFETCH_PAGES):
+        self.client = client
+        self.batch_pages = batch_pages
+        self.movies = []
+        self.exhausted = False
+        self._seen = set()
+        self._next_page = 1
+        self._pending = {}
+        self._failed = set()
+
+    def _prefetch(self):
+        if self._pending or self.exhausted:
+            return
+        # Failed pages first, topped up with new ones to a full batch
+        pages = sorted(self._failed)
+        last = min(self._next_page + max(self.batch_pages - len(pages), 0), MAX_POPULAR_PAGE + 1)
+        pages += range(self._next_page, last)
+        self._failed = set()
+        self._pending = self.client.prefetch_popular(pages)
+        self._next_page = last
+
+    def _collect(self):
+        # Merge the pending batch in page order; an empty page means TMDb has
+        # no more, a failed one is kept for a retry
+        pending, self._pending = self._pending, {}
+        added = 0
+        for page in sorted(pending):
+            results = pending[page].result()
+            if results is None:
+                self._failed.add(page)
+                continue
+            if not results:
+                self.exhausted = True
+                continue
+            for movie in results:
+                movie_id = str(movie["id"])
+                if movie_id not in self._seen:
+                    self._seen.add(movie_id)
+                    self.movies.append(movie)
+                    added += 1
+        if self._next_page > MAX_POPULAR_PAGE and not self._failed:
+            self.exhausted = True
+        return added
+
+    def available(self, exclude_ids, count):
+        # The first `count` movies whose id is not in exclude_ids (e.g. the
+        # user's checklist), fetching further batches only as needed
+        exclude_ids = {str(movie_id) for movie_id in exclude_ids}
+        available = [movie for movie in self.movies if str(movie["id"]) not in exclude_ids]
+        while len(available) < count and not self.exhausted:
+            self._prefetch()
+            start = len(self.movies)
+            self._collect()
+            available.extend(movie for movie in self.movies[start:] if str(movie["id"]) not in exclude_ids)
+            if self._failed:
+                # TMDb is failing; show what there is and retry on the next rerun
+                return available[:count]
+        self._prefetch()
+        return available[:count]
+
+# Shared by every session in the process so the connection pool is reused
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TMDbClient(cache=ResponseCache())
+    return _client
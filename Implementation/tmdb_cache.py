@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "tmdb_cache.db"
+MAX_BYTES = 64 * 1024 * 1024
+HOUR = 3600
+DAY = 24 * HOUR
+# (fresh for, then served stale while a refresh runs for) per endpoint
+TTLS = {
+    "popular": (6 * HOUR, 7 * DAY),
+    "search": (DAY, 7 * DAY),
+    "details": (7 * DAY, 30 * DAY)
+}
+DEFAULT_TTL = (HOUR, DAY)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        endpoint TEXT NOT NULL,
+        body TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fetched REAL NOT NULL,
+        accessed REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+]
+
+FRESH, STALE, EXPIRED = "fresh", "stale", "expired"
+
+def cache_key(path, params):
+    # Endpoint plus its parameters in a fixed order; the API key is not part of it
+    items = sorted((name, str(value)) for name, value in params.items() if name != "api_key")
+    return path + "?" + "&".join(f"{name}={value}" for name, value in items)
+
+class ResponseCache:
+    # Decoded TMDb responses shared by every session (and process) through one
+    # SQLite file. Entries older than the endpoint's TTL are still returned,
+    # marked STALE, so the caller can serve them and refresh in the background;
+    # past the stale window they are EXPIRED. The file is held under max_bytes
+    # by evicting the least recently used entries.
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def get(self, key, endpoint):
+        # (body, state), or (None, EXPIRED) when nothing is stored
+        conn = self._connect()
+        row = conn.execute("SELECT body, fetched FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None, EXPIRED
+        fresh_for, stale_for = TTLS.get(endpoint, DEFAULT_TTL)
+        now = time.time()
+        age = now - row[1]
+        state = FRESH if age < fresh_for else STALE if age < fresh_for + stale_for else EXPIRED
+        self._count({FRESH: "hits", STALE: "stale_hits", EXPIRED: "misses"}[state])
+        with conn:
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), state
+
+    def peek(self, key, endpoint):
+        # The stored body if it is fresh or stale, else None; not counted as a lookup
+        row = self._connect().execute("SELECT body, fetched FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] >= sum(TTLS.get(endpoint, DEFAULT_TTL)):
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, endpoint, body):
+        text = json.dumps(body, separators=(",", ":"))
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO responses (key, endpoint, body, size, fetched, accessed) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (key, endpoint, text, len(text), now, now))
+        with self._lock:
+            self._size += len(text) - (old[0] if old else 0)
+            self.counters["stores"] += 1
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        # Least recently used first, down to 90% of the budget so eviction
+        # does not run again on the very next store
+        target = int(self.max_bytes * 0.9)
+        conn = self._connect()
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            removed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if total - removed <= target:
+                    break
+                victims.append((key,))
+                removed += size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        with self._lock:
+            self._size = total - removed
+            self.counters["evictions"] += len(victims)
+
+    def titles(self):
+        # Every movie title in the stored responses (result lists and details)
+        titles = []
+        for (body,) in self._connect().execute("SELECT body FROM responses"):
+            data = json.loads(body)
+            if "results" in data:
+                titles.extend(movie["title"] for movie in data["results"] if movie.get("title"))
+            elif data.get("title"):
+                titles.append(data["title"])
+        return titles
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, bytes=self._size)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
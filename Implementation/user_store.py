@@ -0,0 +1,520 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_FILE = "users.db"
+LEGACY_FILE = "users.json"
+PROFILE_FIELDS = ["password", "full_name", "dob", "email", "avatar_path"]
+CHECKLIST_FIELDS = ["title", "watched", "poster", "rating", "watched_date", "user_rating"]
+# Checklist fields that describe the film itself and live once in the movies table
+MOVIE_FIELDS = ["title", "poster", "rating"]
+ENTRY_FIELDS = ["watched", "watched_date", "user_rating"]
+SCHEMA_VERSION = 1
+# Writes append to the WAL; fold it back into the main file this often
+CHECKPOINT_EVERY = 500
+# Notifications older than this are pruned when the store opens and then by
+# the first write after every PRUNE_INTERVAL seconds, so retention does not
+# depend on how long a process lives
+NOTIFICATION_TTL_DAYS = 90
+PRUNE_INTERVAL = 3600
+INBOX_PAGE_SIZE = 10
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password TEXT NOT NULL,
+        full_name TEXT,
+        dob TEXT,
+        email TEXT,
+        avatar_path TEXT,
+        unread INTEGER NOT NULL DEFAULT 0,
+        read_upto INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS movies (
+        movie_id TEXT PRIMARY KEY,
+        title TEXT,
+        poster TEXT,
+        rating,
+        runtime INTEGER,
+        genres TEXT,
+        release_date TEXT,
+        hydrated REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS checklist (
+        username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+        movie_id TEXT NOT NULL REFERENCES movies(movie_id),
+        watched INTEGER NOT NULL DEFAULT 0,
+        watched_date TEXT,
+        user_rating,
+        PRIMARY KEY (username, movie_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+        message TEXT NOT NULL,
+        read INTEGER NOT NULL DEFAULT 0,
+        created REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS notifications_user ON notifications(username, id)",
+    "CREATE INDEX IF NOT EXISTS notifications_created ON notifications(created)"
+]
+
+DEFAULT_USERS = {"admin": {
+    "password": "123",
+    "full_name": "Admin User",
+    "dob": None,
+    "email": "admin@example.com",
+    "avatar_path": None,
+    "movie_checklist": {},
+    "notifications": []
+}}
+
+def _new_record(record):
+    # Same defaults load_credentials used to backfill on every read
+    user = {field: record.get(field) for field in PROFILE_FIELDS}
+    user["movie_checklist"] = {str(k): _new_entry(v) for k, v in (record.get("movie_checklist") or {}).items()}
+    user["notifications"] = [_new_notification(n) for n in record.get("notifications") or []]
+    user["unread"] = sum(not notif["read"] for notif in user["notifications"])
+    return user
+
+def _cached_record(user):
+    # The snapshot holds profiles, checklists and counters; notifications are
+    # read from their table on demand so history length does not matter
+    return copy.deepcopy({field: value for field, value in user.items() if field != "notifications"})
+
+def _new_entry(entry):
+    entry = {field: entry.get(field) for field in CHECKLIST_FIELDS}
+    entry["watched"] = bool(entry["watched"])
+    return entry
+
+def _movie_rows(checklist):
+    return {movie_id: {field: entry[field] for field in MOVIE_FIELDS} for movie_id, entry in checklist.items()}
+
+def _new_notification(notif):
+    return {"message": notif["message"], "read": bool(notif.get("read"))}
+
+class UserStore:
+    # WAL-mode SQLite file with one row per user, per checklist entry and per
+    # notification: a login, a rating or a "mark watched" touches only its own
+    # rows, and writers serialize on the database lock instead of overwriting
+    # each other's copy of users.json. The WAL is the append-only journal;
+    # every CHECKPOINT_EVERY writes it is checkpointed back into users.db.
+    # Each user's notification rows form their inbox queue. users.unread is kept
+    # in step by every write so the count never needs a scan, and "mark all
+    # read" only moves the users.read_upto watermark (the newest id seen).
+    # Reads are served from an in-process snapshot that is never changed in
+    # place: a write patches a copy and swaps it in after the commit, and the
+    # snapshot is reloaded when another process changes the files.
+    def __init__(self, path=DB_FILE, legacy_path=LEGACY_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._local = threading.local()
+        self._users = None
+        self._stamp = None
+        self._cache_lock = threading.RLock()
+        self._writes = 0
+        self._pruned = 0.0
+        self._migrate()
+        self.prune_notifications()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; Streamlit runs each session on its own thread
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so a read-modify-write
+        # cannot interleave with another session's
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _migrate(self):
+        # Creates the schema and, on first open, imports users.json (or seeds
+        # the default admin when there is none)
+        with self._transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            for statement in SCHEMA:
+                conn.execute(statement)
+            if os.path.exists(self.legacy_path):
+                with open(self.legacy_path) as f:
+                    users = json.load(f)
+            else:
+                users = DEFAULT_USERS
+            for username, record in users.items():
+                self._insert_user(conn, username, _new_record(record))
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _insert_user(conn, username, user, replace=False):
+        sql = (f"INSERT INTO users (username, {', '.join(PROFILE_FIELDS)}) "
+               f"VALUES ({', '.join('?' * (len(PROFILE_FIELDS) + 1))})")
+        if replace:
+            sql += " ON CONFLICT(username) DO UPDATE SET " + ", ".join(f"{col} = excluded.{col}" for col in PROFILE_FIELDS)
+        conn.execute(sql, [username] + [user[field] for field in PROFILE_FIELDS])
+        UserStore._replace_checklist(conn, username, user["movie_checklist"])
+        UserStore._replace_notifications(conn, username, user["notifications"])
+
+    @staticmethod
+    def _upsert_entry(conn, username, movie_id, entry):
+        # The film's title/poster/rating go to its shared movies row (keeping any
+        # hydrated details); ON CONFLICT keeps the entry's rowid, i.e. its place
+        # in the list
+        conn.execute(f"INSERT INTO movies (movie_id, {', '.join(MOVIE_FIELDS)}) "
+                     f"VALUES ({', '.join('?' * (len(MOVIE_FIELDS) + 1))}) "
+                     "ON CONFLICT(movie_id) DO UPDATE SET "
+                     + ", ".join(f"{field} = excluded.{field}" for field in MOVIE_FIELDS),
+                     [movie_id] + [entry[field] for field in MOVIE_FIELDS])
+        conn.execute(f"INSERT INTO checklist (username, movie_id, {', '.join(ENTRY_FIELDS)}) "
+                     f"VALUES ({', '.join('?' * (len(ENTRY_FIELDS) + 2))}) "
+                     "ON CONFLICT(username, movie_id) DO UPDATE SET "
+                     + ", ".join(f"{field} = excluded.{field}" for field in ENTRY_FIELDS),
+                     [username, movie_id] + [entry[field] for field in ENTRY_FIELDS])
+
+    @staticmethod
+    def _replace_checklist(conn, username, checklist):
+        conn.execute("DELETE FROM checklist WHERE username = ?", (username,))
+        for movie_id, entry in checklist.items():
+            UserStore._upsert_entry(conn, username, movie_id, entry)
+
+    @staticmethod
+    def _replace_notifications(conn, username, notifications):
+        conn.execute("DELETE FROM notifications WHERE username = ?", (username,))
+        now = time.time()
+        conn.executemany("INSERT INTO notifications (username, message, read, created) VALUES (?, ?, ?, ?)",
+                         [(username, notif["message"], notif["read"], now) for notif in notifications])
+        conn.execute("UPDATE users SET unread = ? WHERE username = ?",
+                     (sum(not notif["read"] for notif in notifications), username))
+
+    @staticmethod
+    def _exists(conn, username):
+        return conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def _file_stamp(self):
+        # Every commit appends to the -wal file; a checkpoint rewrites the main file
+        stamp = []
+        for path in (self.path, f"{self.path}-wal"):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _load_users(self):
+        # One read transaction, so both tables are seen at the same commit
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            users = {}
+            for row in conn.execute("SELECT * FROM users ORDER BY rowid"):
+                users[row["username"]] = dict({field: row[field] for field in PROFILE_FIELDS},
+                                              movie_checklist={}, unread=row["unread"])
+            for row in conn.execute("SELECT * FROM checklist JOIN movies USING (movie_id) ORDER BY checklist.rowid"):
+                users[row["username"]]["movie_checklist"][row["movie_id"]] = _new_entry(dict(row))
+        finally:
+            conn.execute("COMMIT")
+        return users
+
+    def _notifications(self, username=None):
+        # Oldest first, as users.json stored them; a row is read if it was marked
+        # individually or is at or below the user's watermark
+        sql = ("SELECT n.id, n.username, n.message, n.read OR n.id <= u.read_upto AS read, n.created "
+               "FROM notifications AS n JOIN users AS u USING (username)")
+        if username is None:
+            return self._connect().execute(f"{sql} ORDER BY n.id").fetchall()
+        return self._connect().execute(f"{sql} WHERE n.username = ? ORDER BY n.id", (username,)).fetchall()
+
+    def _snapshot(self):
+        # The stamp is taken before the query, so a write racing the reload only
+        # makes the next call reload again
+        stamp = self._file_stamp()
+        users = self._users
+        if users is not None and self._stamp == stamp:
+            return users
+        with self._cache_lock:
+            if self._users is None or self._stamp != stamp:
+                self._users = self._load_users()
+                self._stamp = stamp
+            return self._users
+
+    @contextmanager
+    def _write(self):
+        # Write-through, copy-on-write: if the snapshot was current when the
+        # write lock was taken, the write patches a copy that replaces it once
+        # committed, so a reader copying the snapshot never sees it change and a
+        # rolled-back write leaves it as it was; otherwise it is dropped and
+        # reloaded on the next read
+        with self._cache_lock:
+            with self._transaction() as conn:
+                fresh = self._users is not None and self._stamp == self._file_stamp()
+                users = copy.deepcopy(self._users) if fresh else {}
+                yield conn, users
+            if fresh:
+                self._users = users
+                self._stamp = self._file_stamp()
+            else:
+                self._users = None
+            self._writes += 1
+            if time.time() - self._pruned >= PRUNE_INTERVAL:
+                self.prune_notifications()
+            if self._writes % CHECKPOINT_EVERY == 0:
+                self.compact()
+
+    def compact(self):
+        # Copies the journal into users.db and truncates it; the content is
+        # unchanged, so a current snapshot stays current
+        with self._cache_lock:
+            fresh = self._users is not None and self._stamp == self._file_stamp()
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if fresh:
+                self._stamp = self._file_stamp()
+
+    def all_users(self):
+        # Copied so callers can mutate the result without touching the snapshot
+        users = copy.deepcopy(self._snapshot())
+        for user in users.values():
+            user["notifications"] = []
+        for row in self._notifications():
+            if row["username"] in users:
+                users[row["username"]]["notifications"].append(_new_notification(dict(row)))
+        return users
+
+    def usernames(self):
+        return list(self._snapshot())
+
+    def get_user(self, username, notifications=True):
+        user = self._snapshot().get(username)
+        if user is None:
+            return None
+        user = copy.deepcopy(user)
+        if notifications:
+            user["notifications"] = [_new_notification(dict(row)) for row in self._notifications(username)]
+        return user
+
+    def check_password(self, username, password):
+        user = self._snapshot().get(username)
+        return user is not None and user["password"] == password
+
+    def create_user(self, username, record):
+        user = _new_record(record)
+        try:
+            with self._write() as (conn, users):
+                self._insert_user(conn, username, user)
+                users[username] = _cached_record(user)
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_user(self, username, **fields):
+        # Only the given profile columns, or the given user's checklist or
+        # notification rows, are rewritten
+        unknown = set(fields) - set(PROFILE_FIELDS) - {"movie_checklist", "notifications"}
+        if unknown:
+            raise ValueError(f"Unknown user field(s): {', '.join(sorted(unknown))}")
+        if not fields:
+            return username in self._snapshot()
+        record = _new_record(fields)
+        with self._write() as (conn, users):
+            if not self._exists(conn, username):
+                return False
+            columns = [field for field in PROFILE_FIELDS if field in fields]
+            if columns:
+                assignments = ", ".join(f"{col} = ?" for col in columns)
+                conn.execute(f"UPDATE users SET {assignments} WHERE username = ?",
+                             [fields[col] for col in columns] + [username])
+            if "movie_checklist" in fields:
+                self._replace_checklist(conn, username, record["movie_checklist"])
+                self._patch_movies(users, _movie_rows(record["movie_checklist"]))
+            if "notifications" in fields:
+                self._replace_notifications(conn, username, record["notifications"])
+                fields["unread"] = record["unread"]
+            if username in users:
+                users[username].update(_cached_record({field: record[field] for field in fields}))
+        return True
+
+    def replace_all(self, users):
+        # Whole-store save kept for save_credentials callers; one transaction
+        records = {username: _new_record(record) for username, record in users.items()}
+        with self._write() as (conn, cached):
+            conn.execute("DELETE FROM users WHERE username NOT IN (SELECT value FROM json_each(?))",
+                         (json.dumps(list(records)),))
+            for username, user in records.items():
+                self._insert_user(conn, username, user, replace=True)
+            cached.clear()
+            cached.update({username: _cached_record(user) for username, user in records.items()})
+            movies = {}
+            for user in records.values():
+                movies.update(_movie_rows(user["movie_checklist"]))
+            self._patch_movies(cached, movies)
+
+    # Fine-grained checklist and inbox operations: each writes only the rows it changes
+
+    def add_movie(self, username, movie_id, entry):
+        movie_id, entry = str(movie_id), _new_entry(entry)
+        with self._write() as (conn, users):
+            if not self._exists(conn, username):
+                return False
+            self._upsert_entry(conn, username, movie_id, entry)
+            if username in users:
+                users[username]["movie_checklist"][movie_id] = dict(entry)
+            self._patch_movies(users, _movie_rows({movie_id: entry}))
+        return True
+
+    @staticmethod
+    def _patch_movies(users, movies):
+        # Carry changes to shared movie rows into every cached checklist holding them
+        for user in users.values():
+            for movie_id, entry in user["movie_checklist"].items():
+                if movie_id in movies:
+                    entry.update(movies[movie_id])
+
+    def _patch_entry(self, username, movie_id, **values):
+        movie_id = str(movie_id)
+        with self._write() as (conn, users):
+            assignments = ", ".join(f"{field} = ?" for field in values)
+            cursor = conn.execute(f"UPDATE checklist SET {assignments} WHERE username = ? AND movie_id = ?",
+                                  list(values.values()) + [username, movie_id])
+            if cursor.rowcount and username in users:
+                users[username]["movie_checklist"][movie_id].update(values)
+        return cursor.rowcount > 0
+
+    def mark_watched(self, username, movie_id, watched_date, watched=True):
+        return self._patch_entry(username, movie_id, watched=bool(watched), watched_date=watched_date)
+
+    def set_rating(self, username, movie_id, user_rating):
+        return self._patch_entry(username, movie_id, user_rating=user_rating)
+
+    def remove_movie(self, username, movie_id):
+        movie_id = str(movie_id)
+        with self._write() as (conn, users):
+            cursor = conn.execute("DELETE FROM checklist WHERE username = ? AND movie_id = ?", (username, movie_id))
+            if cursor.rowcount and username in users:
+                users[username]["movie_checklist"].pop(movie_id, None)
+        return cursor.rowcount > 0
+
+    def movies_to_hydrate(self, max_age_days):
+        # Ids on at least one checklist whose details are missing or older than
+        # max_age_days; each film appears once however many users saved it
+        cutoff = time.time() - max_age_days * 86400
+        rows = self._connect().execute(
+            "SELECT movie_id FROM movies WHERE movie_id IN (SELECT movie_id FROM checklist) "
+            "AND (hydrated IS NULL OR hydrated < ?) ORDER BY movie_id", (cutoff,))
+        return [row["movie_id"] for row in rows]
+
+    def update_movies(self, details):
+        # Writes a batch of TMDb /movie/{id} responses ({movie_id: details}) to
+        # the shared movies rows in one transaction
+        now = time.time()
+        rows = []
+        for movie_id, data in details.items():
+            genres = ", ".join(genre["name"] for genre in data.get("genres") or [])
+            rows.append((data.get("title"), data.get("poster_path"), data.get("vote_average"), data.get("runtime"),
+                         genres or None, data.get("release_date"), now, str(movie_id)))
+        with self._write() as (conn, users):
+            conn.executemany("UPDATE movies SET title = COALESCE(?, title), poster = COALESCE(?, poster), "
+                             "rating = COALESCE(?, rating), runtime = ?, genres = ?, release_date = ?, hydrated = ? "
+                             "WHERE movie_id = ?", rows)
+            movies = {}
+            for row in conn.execute(f"SELECT movie_id, {', '.join(MOVIE_FIELDS)} FROM movies WHERE movie_id IN "
+                                    f"({', '.join('?' * len(rows))})", [row[-1] for row in rows]):
+                movies[row["movie_id"]] = {field: row[field] for field in MOVIE_FIELDS}
+            self._patch_movies(users, movies)
+        return len(rows)
+
+    def get_movies(self, movie_ids):
+        # Shared details for the given ids: {movie_id: {title, poster, rating, runtime, genres, release_date}}
+        movie_ids = [str(movie_id) for movie_id in movie_ids]
+        rows = self._connect().execute(
+            f"SELECT * FROM movies WHERE movie_id IN ({', '.join('?' * len(movie_ids))})", movie_ids)
+        return {row["movie_id"]: {field: row[field] for field in row.keys() if field not in ("movie_id", "hydrated")}
+                for row in rows}
+
+    def push_notifications(self, recipients, message):
+        # Fan-out: one transaction appends to every recipient's inbox and bumps
+        # their counters, so a share is delivered to all of them or to none.
+        # Returns the recipients that exist, in the order given.
+        recipients = list(dict.fromkeys(recipients))
+        with self._write() as (conn, users):
+            placeholders = ", ".join("?" * len(recipients))
+            known = {row["username"] for row in conn.execute(
+                f"SELECT username FROM users WHERE username IN ({placeholders})", recipients)}
+            delivered = [username for username in recipients if username in known]
+            now = time.time()
+            conn.executemany("INSERT INTO notifications (username, message, read, created) VALUES (?, ?, 0, ?)",
+                             [(username, message, now) for username in delivered])
+            conn.executemany("UPDATE users SET unread = unread + 1 WHERE username = ?",
+                             [(username,) for username in delivered])
+            for username in delivered:
+                if username in users:
+                    users[username]["unread"] += 1
+        return delivered
+
+    def push_notification(self, username, message):
+        return bool(self.push_notifications([username], message))
+
+    def unread_count(self, username):
+        user = self._snapshot().get(username)
+        return user["unread"] if user is not None else 0
+
+    def mark_all_read(self, username):
+        # One row update however long the history is
+        with self._write() as (conn, users):
+            conn.execute("UPDATE users SET unread = 0, read_upto = (SELECT COALESCE(MAX(id), 0) "
+                         "FROM notifications WHERE username = ?) WHERE username = ?", (username, username))
+            if username in users:
+                users[username]["unread"] = 0
+
+    def clear_notifications(self, username):
+        with self._write() as (conn, users):
+            conn.execute("DELETE FROM notifications WHERE username = ?", (username,))
+            conn.execute("UPDATE users SET unread = 0 WHERE username = ?", (username,))
+            if username in users:
+                users[username]["unread"] = 0
+
+    def inbox(self, username, limit=INBOX_PAGE_SIZE, before=None):
+        # Newest first, one page at a time: pass the last id of a page as
+        # `before` to get the next (older) one
+        sql = ("SELECT n.id, n.message, n.read OR n.id <= u.read_upto AS read, n.created "
+               "FROM notifications AS n JOIN users AS u USING (username) WHERE n.username = ?")
+        params = [username]
+        if before is not None:
+            sql += " AND n.id < ?"
+            params.append(before)
+        rows = self._connect().execute(f"{sql} ORDER BY n.id DESC LIMIT ?", params + [limit])
+        return [dict(row, read=bool(row["read"])) for row in rows]
+
+    def prune_notifications(self, ttl_days=NOTIFICATION_TTL_DAYS):
+        # Retention: drops notifications older than ttl_days and takes the
+        # unread ones among them off the counters
+        self._pruned = time.time()
+        cutoff = self._pruned - ttl_days * 86400
+        with self._write() as (conn, users):
+            expired = conn.execute(
+                "SELECT n.username, COUNT(*) AS unread FROM notifications AS n JOIN users AS u USING (username) "
+                "WHERE n.created < ? AND n.read = 0 AND n.id > u.read_upto GROUP BY n.username", (cutoff,)).fetchall()
+            conn.executemany("UPDATE users SET unread = unread - ? WHERE username = ?",
+                             [(row["unread"], row["username"]) for row in expired])
+            deleted = conn.execute("DELETE FROM notifications WHERE created < ?", (cutoff,)).rowcount
+            for row in expired:
+                if row["username"] in users:
+                    users[row["username"]]["unread"] -= row["unread"]
+        return deleted